@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'example')]
+
+import metrics
+from eryx_dash.components import EryxTab, EryxRow, EryxCol, DropdownFilter, ChecklistFilter, Card, BarChart, \
+    LineChart, BarLineChart, TreeMapChart, WordCloudChart
+from eryx_dash.data_sources import DataSources
+
+SIZES = {'10k': 10 ** 4, '1M': 10 ** 6, '10M': 10 ** 7}
+CARDINALITIES = {
+    # Number of cities, branches, product lines and payment methods
+    'low': (3, 3, 6, 3),
+    'high': (100, 300, 1000, 20),
+}
+COMPONENTS = ['Card', 'BarChart', 'LineChart', 'BarLineChart', 'TreeMapChart', 'WordCloudChart']
+
+
+def generate(rows, cardinality, seed=0):
+    cities, branches, products, payments = CARDINALITIES[cardinality]
+    random = np.random.default_rng(seed)
+
+    def categorical(prefix, count):
+        values = np.array(['%s %d' % (prefix, i) for i in range(count)], dtype=object)
+        # Skewed frequencies, like the few product lines and cities that sell most
+        weights = 1 / np.arange(1, count + 1)
+        return values[random.choice(count, rows, p=weights / weights.sum())]
+
+    unit_price = random.uniform(10, 100, rows).round(2)
+    quantity = random.integers(1, 11, rows)
+    total = (unit_price * quantity * 1.05).round(4)
+    date = pd.Timestamp('2019-01-01') + pd.to_timedelta(random.integers(0, 365, rows), unit='D')
+    df = pd.DataFrame({
+        # Invoices are numbered instead of formatted, so 10M rows fit in memory
+        'Invoice ID': random.integers(0, max(rows // 2, 1), rows),
+        'Branch': categorical('Branch', branches),
+        'City': categorical('City', cities),
+        'Customer type': np.array(['Member', 'Normal'], dtype=object)[random.integers(0, 2, rows)],
+        'Gender': np.array(['Female', 'Male'], dtype=object)[random.integers(0, 2, rows)],
+        'Product line': categorical('Product', products),
+        'Unit price': unit_price,
+        'Quantity': quantity,
+        'Total': total,
+        'Date': date,
+        'Payment': categorical('Payment', payments),
+        'Rating': random.uniform(4, 10, rows).round(1),
+    })
+    df['Year_Month'] = df['Date'].dt.month.astype(str) + '-' + df['Date'].dt.year.astype(str)
+    df['DayOfWeek'] = df['Date'].dt.day_name()
+    return df
+
+
+def build_tab(df):
+    return EryxTab([EryxRow([
+        EryxCol([
+            DropdownFilter(title='Month', filters=[('sales', 'Year_Month')]),
+            ChecklistFilter(title='City', filters=[('sales', 'City')]),
+            ChecklistFilter(title='Product line', filters=[('sales', 'Product line')]),
+            ChecklistFilter(title='Payment', filters=[('sales', 'Payment')]),
+        ]),
+        EryxCol([
+            Card(title='Invoices', metric=metrics.Invoices()),
+            Card(title='Sales', metric=metrics.Sales()),
+            Card(title='Rating', metric=metrics.Rating()),
+            BarChart('sales', 'DayOfWeek', metrics.Sales(), format='money'),
+            LineChart('sales', 'Date', metrics.Sales(), skip_ticks=3),
+            BarLineChart('sales', 'Product line', metrics.Sales(), metrics.PercentMembers()),
+            TreeMapChart('sales', 'City', 'Total'),
+            WordCloudChart('sales', 'Product line', metrics.Sales()),
+        ]),
+    ])], data_sources=DataSources({'sales': df}))
+
+
+def combinations(df):
+    def top(column, count):
+        return df[column].value_counts().index[:count].tolist()
+
+    month = '6-2019'
+    return {
+        'month': [month, [], [], []],
+        'month and city': [month, top('City', 1), [], []],
+        'month and products': [month, [], top('Product line', 3), []],
+        'every filter': [month, top('City', 2), top('Product line', 5), top('Payment', 1)],
+    }
+
+
+def measure(tab, args, repeat):
+    timings = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tab.callback(*args)
+        for chart in tab.get_charts():
+            timings.setdefault(chart.__class__.__name__, []).append(1000 * tab.timings[chart.get_id()])
+    return 1000 * (time.perf_counter() - start) / repeat, timings
+
+
+def measure_memory(tab, args):
+    memory = {}
+    for chart in tab.get_charts():
+        # Filters are applied before measuring, so the memory is the one of the chart over the filtered data
+        data_sources = tab.data_sources.view()
+        for filter_config, filter in zip(args, tab.get_filters()):
+            filter.filter(data_sources, filter_config)
+        data_sources.materialize()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        output = chart.callback(data_sources)
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # tracemalloc does not count allocations, only the blocks still allocated after the call, like its output and
+        # what it cached, temporaries freed are not counted
+        blocks = max(0, sum(stat.count_diff for stat in after.compare_to(before, 'filename')))
+        peak_bytes, retained_blocks = memory.get(chart.__class__.__name__, (0, 0))
+        memory[chart.__class__.__name__] = (max(peak_bytes, peak), max(retained_blocks, blocks))
+        del output, data_sources
+    return memory
+
+
+def run(sizes, cardinalities, repeat):
+    results = []
+    for size in sizes:
+        for cardinality in cardinalities:
+            df = generate(SIZES[size], cardinality)
+            tab = build_tab(df)
+            for name, args in combinations(df).items():
+                tab.callback(*args)
+                total, timings = measure(tab, args, repeat)
+                memory = measure_memory(tab, args)
+                for component in COMPONENTS:
+                    result = {'rows': size, 'cardinality': cardinality, 'filters': name, 'component': component,
+                              'p50_ms': np.percentile(timings[component], 50),
+                              'p95_ms': np.percentile(timings[component], 95),
+                              'peak_bytes': memory[component][0], 'retained_blocks': memory[component][1]}
+                    results.append(result)
+                    print('%-4s %-5s %-19s %-15s %10.2f %10.2f %12d %9d' % (
+                        size, cardinality, name, component, result['p50_ms'], result['p95_ms'],
+                        result['peak_bytes'], result['retained_blocks']))
+                print('%-4s %-5s %-19s %-15s %10.2f' % (size, cardinality, name, 'callback', total))
+            del tab, df
+    return results
+
+
+def commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    with open(old_path) as old, open(new_path) as new:
+        old, new = json.load(old), json.load(new)
+    key = lambda result: (result['rows'], result['cardinality'], result['filters'], result['component'])
+    baseline = {key(result): result for result in old['results']}
+    print('%s -> %s' % (old['commit'], new['commit']))
+    for result in new['results']:
+        if key(result) in baseline:
+            p50, p95 = baseline[key(result)]['p50_ms'], baseline[key(result)]['p95_ms']
+            print('%-4s %-5s %-19s %-15s p50 %8.2f -> %8.2f (%+6.1f%%)  p95 %8.2f -> %8.2f' % (
+                key(result) + (p50, result['p50_ms'], 100 * (result['p50_ms'] / p50 - 1) if p50 else 0,
+                               p95, result['p95_ms'])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency and memory of the filter to chart pipeline')
+    parser.add_argument('--rows', default='10k,1M', help='comma separated sizes among %s' % ', '.join(SIZES))
+    parser.add_argument('--cardinality', default='low,high', help='comma separated among low, high')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='JSON file, benchmark-<commit>.json by default')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    options = parser.parse_args()
+
+    if options.compare:
+        return compare(*options.compare)
+
+    print('%-4s %-5s %-19s %-15s %10s %10s %12s %9s' % (
+        'rows', 'card', 'filters', 'component', 'p50 ms', 'p95 ms', 'peak bytes', 'retained'))
+    results = run(options.rows.split(','), options.cardinality.split(','), options.repeat)
+    output = options.output or 'benchmark-%s.json' % (commit() or 'unknown')
+    with open(output, 'w') as f:
+        json.dump({'commit': commit(), 'python': platform.python_version(), 'pandas': pd.__version__,
+                   'repeat': options.repeat, 'results': results}, f, indent=2)
+    print('Results written to %s' % output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+import time
+import plotly
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'example')]
+os.chdir(os.path.join(ROOT, 'example'))
+
+from app import monthly_tab
+from eryx_dash.serialization import dumps, orjson, supports_typed_arrays
+
+REPEAT = 50
+FILTERS = ['1-2019', [], [], [], [], [], []]
+
+
+def encoders():
+    yield 'plotly', lambda outputs: json.dumps(outputs, cls=plotly.utils.PlotlyJSONEncoder)
+    if orjson is not None:
+        yield 'fast', dumps
+        yield 'typed', lambda outputs: dumps(outputs, typed_arrays=True)
+
+
+def measure(encode, output):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        payload = encode(output)
+    return len(payload), 1000 * (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    charts = monthly_tab.get_charts()
+    outputs = monthly_tab.compute(monthly_tab.get_filters(), charts, FILTERS)
+
+    print('plotly.js typed arrays supported: %s' % supports_typed_arrays())
+    print('%-32s %-8s %10s %10s' % ('chart', 'encoder', 'bytes', 'ms'))
+    totals = {}
+    for chart, output in zip(charts, outputs):
+        for name, encode in encoders():
+            size, elapsed = measure(encode, output)
+            totals[name] = [a + b for a, b in zip(totals.get(name, (0, 0)), (size, elapsed))]
+            print('%-32s %-8s %10d %10.3f' % (chart.__class__.__name__, name, size, elapsed))
+    for name, (size, elapsed) in totals.items():
+        print('%-32s %-8s %10d %10.3f' % ('total', name, size, elapsed))
+
+
+if __name__ == '__main__':
+    main()
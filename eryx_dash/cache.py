@@ -0,0 +1,94 @@
+import json
+import threading
+from collections import OrderedDict
+
+from eryx_dash.serialization import dumps
+
+
+def normalize(args):
+    # Each filter keeps its position, only the values selected in a filter are unordered
+    return tuple(normalize_value(value) for value in args)
+
+
+def normalize_value(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted((normalize_value(v) for v in value), key=repr))
+    return value
+
+
+def frames_size(frames):
+    # Filtered frames share their string objects with the original data, so only the shallow size is new memory
+    return int(sum(df.memory_usage(index=True, deep=False).sum() for df in frames.values()))
+
+
+def partials_size(partials):
+    return int(sum(getattr(result, 'nbytes', 8) for result in partials.values()))
+
+
+def serialize(outputs):
+    return dumps(outputs)
+
+
+def deserialize(payload):
+    return json.loads(payload)
+
+
+class ResultCache(object):
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+    def set(self, key, value, size):
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            # Values larger than the budget are not stored, and the previous value of the key is stale anyway
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.size -= self.entries.popitem(last=False)[1][1]
+
+    def pop(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            value, size = self.entries.pop(key)
+            self.size -= size
+            return value
+
+    def rename(self, key, new_key):
+        with self.lock:
+            if key not in self.entries:
+                return
+            if new_key in self.entries:
+                self.size -= self.entries.pop(new_key)[1]
+            self.entries[new_key] = self.entries.pop(key)
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'bytes': self.size,
+                    'max_bytes': self.max_bytes}
@@ -0,0 +1,68 @@
+import threading
+import numpy as np
+import pandas as pd
+
+
+class Cooccurrence(object):
+    def __init__(self, df, columns):
+        # Categories are in the order of the option lists of the filters
+        self.categories = {column: pd.Index(np.flip(np.sort(df[column].dropna().unique()))) for column in columns}
+        codes = {column: self.categories[column].get_indexer(df[column]) for column in columns}
+
+        # For every pair of columns, the codes of the second column found with each code of the first one, sorted by the
+        # first code so the values seen with it are a slice
+        self.pairs = {}
+        for column in columns:
+            for other in columns:
+                if other == column:
+                    continue
+                count = len(self.categories[other])
+                valid = (codes[column] >= 0) & (codes[other] >= 0)
+                combined = np.unique(codes[column][valid].astype(np.int64) * count + codes[other][valid])
+                bounds = np.searchsorted(combined // count, np.arange(len(self.categories[column]) + 1))
+                self.pairs[(column, other)] = (bounds, combined % count)
+
+    def available(self, column, selections):
+        mask = np.ones(len(self.categories[column]), dtype=bool)
+        for other, values in selections.items():
+            if other == column or not values:
+                continue
+            bounds, others = self.pairs[(other, column)]
+            codes = self.categories[other].get_indexer(values)
+            allowed = np.zeros(len(mask), dtype=bool)
+            for code in codes[codes >= 0]:
+                allowed[others[bounds[code]:bounds[code + 1]]] = True
+            mask &= allowed
+        return self.categories[column][mask]
+
+
+class CascadingOptions(object):
+    def __init__(self, data_source, columns):
+        self.data_source = data_source
+        self.columns = columns
+        self.cached = (None, None)
+        self.lock = threading.Lock()
+
+    def cooccurrence(self, data_sources):
+        version = data_sources.version(self.data_source)
+        with self.lock:
+            if self.cached[0] != version:
+                # Lazy data sources only read the distinct combinations of the columns
+                self.cached = (version, Cooccurrence(data_sources.distinct(self.data_source, self.columns), self.columns))
+            return self.cached[1]
+
+    def options(self, data_sources, values):
+        cooccurrence = self.cooccurrence(data_sources)
+        selections = {column: selected(value) for column, value in zip(self.columns, values)}
+
+        options = []
+        for column, value in zip(self.columns, values):
+            available = cooccurrence.available(column, selections).tolist()
+            # Selected values stay in the options even when other filters exclude them, so they can be unselected
+            options.append([{'label': item, 'value': item} for item in selected(value) if item not in available] +
+                           [{'label': item, 'value': item} for item in available])
+        return options
+
+
+def selected(value):
+    return [] if value is None else value if isinstance(value, list) else [value]
@@ -0,0 +1,72 @@
+import os
+import pandas as pd
+
+
+class ColumnarFile(object):
+    def __init__(self, path, derived=None):
+        self.path = path
+        self.derived = {} if derived is None else derived
+
+    def is_parquet(self):
+        return self.path.endswith('.parquet')
+
+    def derived_path(self):
+        return self.path + '.derived.feather'
+
+    def schema(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        if self.is_parquet():
+            return pyarrow.parquet.read_schema(self.path, memory_map=True).names
+        return pyarrow.ipc.open_file(pyarrow.memory_map(self.path)).schema.names
+
+    def read(self, path, columns, parquet=False):
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        if parquet:
+            table = pyarrow.parquet.read_table(path, columns=columns, memory_map=True)
+        else:
+            # Uncompressed Feather buffers are mapped from the page cache and shared by every process reading them
+            table = pyarrow.feather.read_table(path, columns=columns, memory_map=True)
+            # Feather reads every column for an empty list, the mapped table only has to keep the number of rows
+            if columns is not None and not columns:
+                table = table.select([])
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def has_derived(self):
+        if not os.path.exists(self.derived_path()) or os.path.getmtime(self.derived_path()) < os.path.getmtime(self.path):
+            return False
+        return set(self.derived) <= set(ColumnarFile(self.derived_path()).schema())
+
+    def write_derived(self):
+        import pyarrow.feather
+
+        # Derived columns are computed in order, so they can use or replace the ones declared before them
+        df = self.read(self.path, None, self.is_parquet())
+        for name, function in self.derived.items():
+            df[name] = function(df)
+        # Workers starting together may write it at once, the file is replaced whole so none maps a partial one
+        path = '%s.%d.tmp' % (self.derived_path(), os.getpid())
+        try:
+            pyarrow.feather.write_feather(df[list(self.derived)].reset_index(drop=True), path,
+                                          compression='uncompressed')
+            os.replace(path, self.derived_path())
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+    def load(self, columns=None):
+        source_columns = [column for column in self.schema()
+                          if column not in self.derived and (columns is None or column in columns)]
+        derived_columns = [column for column in self.derived if columns is None or column in columns]
+
+        df = self.read(self.path, source_columns, self.is_parquet())
+        if derived_columns:
+            if not self.has_derived():
+                self.write_derived()
+            derived = self.read(self.derived_path(), derived_columns)
+            df = pd.concat([df, derived.set_index(df.index)], axis=1)
+        return df
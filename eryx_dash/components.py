@@ -1,8 +1,85 @@
+import logging
+import threading
+import time
 import dash_bootstrap_components as dbc
+import dash_core_components as dcc
+import dash_html_components as html
 import pandas as pd
-from dash.dependencies import Output, Input
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dash import callback_context, no_update
+from dash.dependencies import Output, Input, State
+from eryx_dash.cascading import CascadingOptions
+from eryx_dash.cache import normalize, serialize, deserialize, frames_size, partials_size
+from eryx_dash.data_sources import DataSources
+from eryx_dash.decimation import decimate, target_points
+from eryx_dash.metrics import Metric, compute_grouped
+from eryx_dash.profiling import report, rows
+from eryx_dash.search import SearchOptions
+from eryx_dash.serialization import install, supports_typed_arrays
+from eryx_dash.shared import share, attach, detach
 from eryx_dash.plots import card_chart, empty_card, LoadingGraph, line_chart, dropdown_filter, hbar_chart, \
-    pie_chart, treemap_chart, bar_line_chart, plotly_wordcloud, checklist_filter, bar_chart
+    pie_chart, treemap_chart, bar_line_chart, plotly_wordcloud, checklist_filter, bar_chart, search_dropdown_filter
+
+
+logger = logging.getLogger(__name__)
+
+
+def reads(data_sources, metrics):
+    reads = set(data_sources)
+    for metric in metrics:
+        if metric.reads() is None:
+            return None
+        reads |= metric.reads()
+    return reads
+
+
+def columns(references, metrics):
+    columns = set(references)
+    for metric in metrics:
+        if metric.columns() is None:
+            return None
+        columns |= metric.columns()
+    return columns
+
+
+def decimated(chart, data, y_axes):
+    result = decimate(data, chart.field, y_axes, chart.max_points, chart.decimate)
+    logger.debug('%s decimated from %d to %d points', chart.get_id(), len(data), len(result))
+    return result
+
+
+def timed_callback(chart, data_sources, chart_id):
+    start = time.perf_counter()
+    if data_sources.profile is None:
+        output = chart.callback(data_sources)
+        return output, time.perf_counter() - start, None
+
+    # Stages are returned with the output, so they are also collected from charts computed in other processes, where
+    # the unpickled chart has another id
+    data_sources.profile = []
+    if type(chart).aggregate is ChartComponent.aggregate:
+        output = chart.callback(data_sources)
+        data_sources.record('callback', chart_id, time.perf_counter() - start)
+    else:
+        data = chart.aggregate(data_sources)
+        data_sources.record('aggregate', chart_id, time.perf_counter() - start, rows(data))
+        figure_start = time.perf_counter()
+        output = chart.figure(data)
+        data_sources.record('figure', chart_id, time.perf_counter() - figure_start)
+    return output, time.perf_counter() - start, data_sources.profile
+
+
+def shared_callback(chart, data_sources, manifest, chart_id):
+    # Frames shared by the request are attached for this chart alone, and closed once its output is computed
+    blocks = []
+    data_sources.dictionary.update(attach(manifest, blocks, categoricals=False))
+    try:
+        return timed_callback(chart, data_sources, chart_id)
+    finally:
+        data_sources.clear()
+        data_sources.dictionary.clear()
+        detach(blocks)
 
 
 class EryxComponent(object):
@@ -37,17 +114,56 @@ class ChartComponent(EryxComponent):
     def is_chart(self):
         return True
 
-    def callback(self, data_sources):
+    def reads(self):
+        return None
+
+    def columns(self):
+        return None
+
+    def groupings(self):
+        return []
+
+    def aggregate(self, data_sources):
         raise Exception("Subclass responsibility")
 
+    def figure(self, data):
+        return data
+
+    def callback(self, data_sources):
+        return self.figure(self.aggregate(data_sources))
+
 
 class FilterComponent(EryxComponent):
     def is_filter(self):
         return True
 
+    def writes(self):
+        return None
+
+    def columns(self):
+        return None
+
+    def indexed_columns(self):
+        return []
+
+    def options_column(self):
+        return None
+
+    def conditions(self, filter_config):
+        return None
+
     def filter(self, data_sources, filter_config):
         raise Exception("Subclass responsibility")
 
+    def add_to_dash_app(self, app, data_sources):
+        pass
+
+
+def add_search_callback(filter, app, data_sources):
+    app.callback(Output(filter.get_id(), 'options'), [Input(filter.get_id(), 'search_value')],
+                 [State(filter.get_id(), 'value')])(
+        lambda search_value, value: filter.search.options(data_sources, search_value, value))
+
 
 class EryxRow(EryxComponent):
     def __init__(self, children):
@@ -75,39 +191,95 @@ class PlaceHolder(EryxComponent):
 
 
 class DropdownFilter(FilterComponent):
-    def __init__(self, title, filters):
+    def __init__(self, title, filters, search=False, page_size=50):
         self.title = title
         self.filters = filters
+        self.search = SearchOptions(filters[0][0], filters[0][1], page_size) if search else None
 
     def is_filter(self):
         return True
 
+    def writes(self):
+        return {table for table, column in self.filters}
+
+    def columns(self):
+        return self.filters
+
+    def indexed_columns(self):
+        return self.filters
+
+    def options_column(self):
+        return self.filters[0] if self.search is None else None
+
+    def conditions(self, filter_config):
+        return [(table, column, [] if filter_config is None else [filter_config]) for table, column in self.filters]
+
     def dash_component(self, data_sources):
-        return dropdown_filter(self.title, self.get_id(), data_sources.get(self.filters[0][0]), self.filters[0][1])
+        table, column = self.filters[0]
+        if self.search is not None:
+            return search_dropdown_filter(self.title, self.get_id(), self.search.first(data_sources))
+        return dropdown_filter(self.title, self.get_id(), data_sources.distinct(table, [column]), column)
+
+    def add_to_dash_app(self, app, data_sources):
+        if self.search is not None:
+            add_search_callback(self, app, data_sources)
 
     def filter(self, data_sources, filter_config):
         for table, column in self.filters:
-            df = data_sources.get(table)
-            data_sources.set_filter(table, df[df[column] == filter_config])
+            index = data_sources.index(table, column)
+            if data_sources.is_lazy(table):
+                data_sources.restrict(table, column, [filter_config])
+            elif index is not None:
+                data_sources.select(table, index.lookup([filter_config]))
+            else:
+                data_sources.where(table, column, lambda values: values == filter_config)
 
 
 class ChecklistFilter(FilterComponent):
-    def __init__(self, title, filters, **kwargs):
+    def __init__(self, title, filters, search=False, page_size=50, **kwargs):
         self.title = title
         self.filters = filters
+        self.search = SearchOptions(filters[0][0], filters[0][1], page_size) if search else None
         self.extra_args = kwargs
 
     def is_filter(self):
         return True
 
+    def writes(self):
+        return {table for table, column in self.filters}
+
+    def columns(self):
+        return self.filters
+
+    def indexed_columns(self):
+        return self.filters
+
+    def options_column(self):
+        return self.filters[0] if self.search is None else None
+
+    def conditions(self, filter_config):
+        return [(table, column, filter_config) for table, column in self.filters] if filter_config else []
+
     def dash_component(self, data_sources):
-        return checklist_filter(self.title, self.get_id(), data_sources.get(self.filters[0][0]), self.filters[0][1], **self.extra_args)
+        table, column = self.filters[0]
+        if self.search is not None:
+            return search_dropdown_filter(self.title, self.get_id(), [], multi=True)
+        return checklist_filter(self.title, self.get_id(), data_sources.distinct(table, [column]), column, **self.extra_args)
+
+    def add_to_dash_app(self, app, data_sources):
+        if self.search is not None:
+            add_search_callback(self, app, data_sources)
 
     def filter(self, data_sources, filter_config):
         if filter_config:
             for table, column in self.filters:
-                df = data_sources.get(table)
-                data_sources.set_filter(table, df[df[column].isin(filter_config)])
+                index = data_sources.index(table, column)
+                if data_sources.is_lazy(table):
+                    data_sources.restrict(table, column, filter_config)
+                elif index is not None:
+                    data_sources.select(table, index.lookup(filter_config))
+                else:
+                    data_sources.where(table, column, lambda values: values.isin(filter_config))
 
 
 class Card(ChartComponent):
@@ -118,11 +290,31 @@ class Card(ChartComponent):
     def get_property(self):
         return 'children'
 
+    def reads(self):
+        return reads([], [self.metric])
+
+    def columns(self):
+        return columns([], [self.metric])
+
+    def groupings(self):
+        return [(None, [self.metric])]
+
     def dash_component(self, data_sources):
         return empty_card(self.title, self.get_id())
 
-    def callback(self, data_sources):
-        return self.metric.formatted(data_sources)
+    def formats_itself(self):
+        # Metrics overriding formatted compute and format their value at once
+        return getattr(type(self.metric), 'formatted', None) is not Metric.formatted
+
+    def aggregate(self, data_sources):
+        if self.formats_itself():
+            return self.metric.formatted(data_sources)
+        return self.metric.value(data_sources)
+
+    def figure(self, data):
+        if self.formats_itself():
+            return data
+        return self.metric.format(data)
 
 
 class HorizontalBarChart(ChartComponent):
@@ -135,25 +327,30 @@ class HorizontalBarChart(ChartComponent):
         self.percentage_of_total = percentage_of_total
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric])
+
+    def groupings(self):
+        return [(self.field, [self.metric])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
-
-        df = data_sources.get(self.data_source)
-        df = df.groupby(self.field).apply(compute_group).rename(self.metric.name())
+    def aggregate(self, data_sources):
+        df = compute_grouped([self.metric], data_sources, self.data_source, self.field)[self.metric.name()]
 
         if self.percentage_of_total:
             df = df / df.sum()
-        return hbar_chart(df.reset_index().sort_values(self.metric.name()).tail(self.top_n), self.metric.name(), self.field, height=self.height, **self.extra_args)
+        return df.reset_index().sort_values(self.metric.name()).tail(self.top_n)
+
+    def figure(self, data):
+        return hbar_chart(data, self.metric.name(), self.field, height=self.height, **self.extra_args)
 
 
 class BarChart(ChartComponent):
@@ -166,22 +363,27 @@ class BarChart(ChartComponent):
         self.sort_by_column = sort_by_column
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric])
+
+    def groupings(self):
+        return [(self.field, [self.metric])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
+    def aggregate(self, data_sources):
+        df = compute_grouped([self.metric], data_sources, self.data_source, self.field)[self.metric.name()]
+        return df.reset_index().sort_values(self.metric.name(), ascending=False).head(self.top_n)
 
-        df = data_sources.get(self.data_source)
-        df = df.groupby(self.field).apply(compute_group).rename(self.metric.name())
-        return bar_chart(df.reset_index().sort_values(self.metric.name(), ascending=False).head(self.top_n), self.field, self.metric.name(), height=self.height, **self.extra_args)
+    def figure(self, data):
+        return bar_chart(data, self.field, self.metric.name(), height=self.height, **self.extra_args)
 
 
 class WordCloudChart(ChartComponent):
@@ -193,22 +395,26 @@ class WordCloudChart(ChartComponent):
         self.top_n = top_n
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric])
+
+    def groupings(self):
+        return [(self.field, [self.metric])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
+    def aggregate(self, data_sources):
+        return compute_grouped([self.metric], data_sources, self.data_source, self.field)[self.metric.name()].reset_index()
 
-        df = data_sources.get(self.data_source)
-        df = df.groupby(self.field).apply(compute_group).rename(self.metric.name())
-        return plotly_wordcloud(df.reset_index(), self.field, self.metric.name(), height=self.height)
+    def figure(self, data):
+        return plotly_wordcloud(data, self.field, self.metric.name(), height=self.height)
 
 
 class PieChart(ChartComponent):
@@ -219,22 +425,27 @@ class PieChart(ChartComponent):
         self.height = height
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric])
+
+    def groupings(self):
+        return [(self.field, [self.metric])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
+    def aggregate(self, data_sources):
+        df = compute_grouped([self.metric], data_sources, self.data_source, self.field)[self.metric.name()]
+        return df.reset_index().sort_values(self.metric.name())
 
-        df = data_sources.get(self.data_source)
-        df = df.groupby(self.field).apply(compute_group).rename(self.metric.name())
-        return pie_chart(df.reset_index().sort_values(self.metric.name()), self.field, self.metric.name(), height=self.height)
+    def figure(self, data):
+        return pie_chart(data, self.field, self.metric.name(), height=self.height)
 
 
 class MetricsPieChart(ChartComponent):
@@ -244,126 +455,513 @@ class MetricsPieChart(ChartComponent):
         self.height = height
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], self.metrics)
+
+    def columns(self):
+        return columns([], self.metrics)
+
+    def groupings(self):
+        return [(None, self.metrics)]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
+    def aggregate(self, data_sources):
         rows = []
         for metric in self.metrics:
-            rows.append([metric.name(), metric.compute(data_sources)])
-        df = pd.DataFrame(rows, columns=['Métrica', 'Total'])
-        return pie_chart(df, 'Métrica', 'Total', height=self.height, **self.extra_args)
+            rows.append([metric.name(), metric.value(data_sources)])
+        return pd.DataFrame(rows, columns=['Métrica', 'Total'])
+
+    def figure(self, data):
+        return pie_chart(data, 'Métrica', 'Total', height=self.height, **self.extra_args)
 
 
 class LineChart(ChartComponent):
-    def __init__(self, src, field, metric, height=None, **kwargs):
+    def __init__(self, src, field, metric, height=None, decimate=None, max_points=None, width=1200, **kwargs):
         self.data_source = src
         self.field = field
         self.metric = metric
         self.height = height
+        self.decimate = decimate
+        self.max_points = target_points(max_points, width)
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric])
+
+    def groupings(self):
+        return [(self.field, [self.metric])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
+    def aggregate(self, data_sources):
+        df = compute_grouped([self.metric], data_sources, self.data_source, self.field)[self.metric.name()]
+        df = df.reset_index().sort_values(self.field)
+        if self.decimate is not None:
+            df = decimated(self, df, [self.metric.name()])
+        return df
 
-        df = data_sources.get(self.data_source)
-        df = df.groupby(self.field).apply(compute_group).rename(self.metric.name())
-        return line_chart(df.reset_index().sort_values(self.field), self.field, self.metric.name(), height=self.height, **self.extra_args)
+    def figure(self, data):
+        return line_chart(data, self.field, self.metric.name(), height=self.height, **self.extra_args)
 
 
 class BarLineChart(ChartComponent):
-    def __init__(self, src, field, metric_1, metric_2, height=None, **kwargs):
+    def __init__(self, src, field, metric_1, metric_2, height=None, decimate=None, max_points=None, width=1200, **kwargs):
         self.data_source = src
         self.field = field
         self.metric_1 = metric_1
         self.metric_2 = metric_2
         self.height = height
+        self.decimate = decimate
+        self.max_points = target_points(max_points, width)
         self.extra_args = kwargs
 
+    def reads(self):
+        return reads([self.data_source], [self.metric_1, self.metric_2])
+
+    def columns(self):
+        return columns([(self.data_source, self.field)], [self.metric_1, self.metric_2])
+
+    def groupings(self):
+        return [(self.field, [self.metric_1, self.metric_2])]
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
-        def compute_group_1(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric_1.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
-
-        def compute_group_2(group):
-            data_sources.set_group_filter(self.data_source, group)
-            metric = self.metric_2.compute(data_sources)
-            data_sources.clear_group_filter()
-            return metric
+    def aggregate(self, data_sources):
+        df = compute_grouped([self.metric_1, self.metric_2], data_sources, self.data_source, self.field)
+        df = df.reset_index().sort_values(self.field)
+        if self.decimate is not None:
+            df = decimated(self, df, [self.metric_1.name(), self.metric_2.name()])
+        return df
 
-        df = data_sources.get(self.data_source)
-        df1 = df.groupby(self.field).apply(compute_group_1).rename(self.metric_1.name()).reset_index()
-        df2 = df.groupby(self.field).apply(compute_group_2).rename(self.metric_2.name()).reset_index()
-        df3 = df1.merge(df2, on=self.field)
-
-        return bar_line_chart(df3.reset_index().sort_values(self.field), self.field, self.metric_1.name(), self.metric_2.name(), self.metric_1.name(), self.metric_2.name(), height=self.height, **self.extra_args)
+    def figure(self, data):
+        return bar_line_chart(data, self.field, self.metric_1.name(), self.metric_2.name(), self.metric_1.name(), self.metric_2.name(), height=self.height, **self.extra_args)
 
 
 class TreeMapChart(ChartComponent):
     def __init__(self, src, category, aggregate, height=None, **kwargs):
         self.data_source = src
         self.category = category
-        self.aggregate = aggregate
+        self.aggregate_column = aggregate
         self.height = height
         self.extra_args = kwargs
 
+    def reads(self):
+        return {self.data_source}
+
+    def columns(self):
+        return {(self.data_source, self.category), (self.data_source, self.aggregate_column)}
+
     def get_property(self):
         return 'figure'
 
     def dash_component(self, data_sources):
         return LoadingGraph(id=self.get_id(), height=self.height)
 
-    def callback(self, data_sources):
+    def aggregate(self, data_sources):
         df = data_sources.get(self.data_source)
-        return treemap_chart(df, [self.category], self.aggregate, self.category, height=self.height)
+        if isinstance(df[self.category].dtype, pd.CategoricalDtype):
+            # Plotly takes the maximum of the tiles, which unordered categoricals do not have, and would draw the
+            # categories without rows as empty tiles
+            return df.assign(**{self.category: df[self.category].astype(object)})
+        return df
+
+    def figure(self, data):
+        return treemap_chart(data, [self.category], self.aggregate_column, self.category, height=self.height)
 
 
 class EryxTab(EryxComponent):
-    def __init__(self, children, data_sources):
+    def __init__(self, children, data_sources, cache=None, executor=None, cubes=False, profiler=None, cascading=False):
         self.children = children
         self.data_sources = data_sources
+        self.cache = cache
+        self.executor = executor
+        self.profiler = profiler
+        self.timings = {}
+        self.refresh_interval = None
+        self.debug_panel = False
+        self.local = threading.local()
+
+        self.data_sources.require(self.columns())
+        self.data_sources.add_dimensions(self.dimensions())
+        for filter in self.get_filters():
+            for table, column in filter.indexed_columns():
+                self.data_sources.build_index(table, column)
+        self.data_sources.add_listener(self.data_changed)
+        if cubes:
+            self.build_cubes()
+        self.cascading = self.build_cascading() if cascading else []
+
+    def build_cascading(self):
+        filters = OrderedDict()
+        for filter in self.get_filters():
+            if filter.options_column() is not None:
+                table, column = filter.options_column()
+                filters.setdefault(table, OrderedDict()).setdefault(column, filter)
+
+        # The options of each filter only depend on the other filters over the same data source
+        cascading = []
+        for table, columns in filters.items():
+            if len(columns) > 1:
+                options = CascadingOptions(table, list(columns))
+                options.cooccurrence(self.data_sources)
+                cascading.append((list(columns.values()), options))
+        return cascading
+
+    def build_cubes(self):
+        dimensions = {}
+        for filter in self.get_filters():
+            for table, column in filter.columns() or []:
+                dimensions.setdefault(table, []).append(column)
+
+        # Only decomposable aggregations can be summed over the cube cells selected by the filters
+        leaves = OrderedDict()
+        for chart in self.get_charts():
+            for field, metrics in chart.groupings():
+                for metric in metrics:
+                    aggregation = metric.aggregation()
+                    for leaf in (aggregation.leaves() if aggregation is not None else []):
+                        if leaf.decomposable:
+                            leaves.setdefault((leaf.data_source, field), OrderedDict())[leaf] = True
+
+        for (data_source, field), cube_leaves in leaves.items():
+            cube = self.data_sources.build_cube(data_source, dimensions.get(data_source, []), field, cube_leaves)
+            if cube is not None:
+                logger.debug('Cube of %s by %s built with %d cells', data_source, field, len(cube.table))
 
     def dash_component(self, data_sources):
-        return dbc.Container([c.dash_component(data_sources) for c in self.children], fluid=True)
+        components = [c.dash_component(data_sources) for c in self.children]
+        if self.refresh_interval is not None:
+            # The versions the client has seen also trigger the first outputs of the charts reading no filtered data
+            components.append(dcc.Interval(id=self.get_id() + '-interval', interval=self.refresh_interval))
+            components.append(dcc.Store(id=self.versions_id(),
+                                        data={'versions': self.versions(self.get_charts()), 'changed': []}))
+        elif not all(self.dependencies()):
+            components.append(dcc.Store(id=self.load_id()))
+        if self.debug_panel:
+            components.append(html.Details(
+                [html.Summary('Profile')] + [html.Pre(id=self.profile_id(i), style={'fontSize': 11})
+                                             for i in range(len(self.dependencies()))]))
+        return dbc.Container(components, fluid=True)
+
+    def columns(self):
+        columns = set()
+        for component in self.get_filters() + self.get_charts():
+            if component.columns() is None:
+                return None
+            columns |= set(component.columns())
+        return columns
+
+    def dimensions(self):
+        # Columns compared by the filters or grouped by the charts, the ones stored as categoricals by optimize
+        dimensions = set()
+        for filter in self.get_filters():
+            dimensions |= set(filter.columns() or [])
+        for chart in self.get_charts():
+            dimensions |= {(chart.data_source, field) for field, metrics in chart.groupings() if field is not None}
+        return dimensions
+
+    def dependencies(self):
+        groups = OrderedDict()
+        for chart in self.get_charts():
+            chart_reads = chart.reads()
+            filters = tuple(filter for filter in self.get_filters()
+                            if chart_reads is None or filter.writes() is None or
+                            self.data_sources.downstream(filter.writes()) & chart_reads)
+            groups.setdefault(filters, []).append(chart)
+        return groups
 
     def callback(self, *args, **kwargs):
-        self.data_sources.clear()
+        return self.compute_outputs(self.get_filters(), self.get_charts(), args)
+
+    def group_callback(self, filters, charts):
+        def callback(*args):
+            # Charts reading no filtered data are only triggered by the store loaded with the tab
+            return self.compute_outputs(filters, charts, args if filters else ())
+
+        return callback
+
+    def versions_callback(self):
+        def callback(n_intervals, seen):
+            # Clients poll once for the whole tab, the charts are only triggered when the data they may read changed
+            versions = self.versions(self.get_charts())
+            changed = [name for name, version in versions.items()
+                       if seen is None or seen['versions'].get(name) != version]
+            if not changed:
+                return no_update
+            return {'versions': versions, 'changed': changed}
+
+        return callback
+
+    def refresh_callback(self, filters, charts, compute):
+        def callback(*args):
+            args, seen = args[:-1], args[-1]
+            triggered = [trigger['prop_id'] for trigger in callback_context.triggered]
+            if not callback_context.triggered or any(prop_id != self.versions_id() + '.data' for prop_id in triggered):
+                return compute(*args)
+
+            # Only the charts reading the data sources changed since the last poll are computed
+            changed = self.data_sources.downstream(seen['changed'])
+            stale = [chart for chart in charts if chart.reads() is None or changed & chart.reads()]
+            if not stale:
+                return [no_update] * len(charts)
+            outputs = dict(zip(stale, self.compute_outputs(filters, stale, args if filters else ())))
+            return [outputs.get(chart, no_update) for chart in charts]
+
+        return callback
+
+    def debug_callback(self, compute):
+        def callback(*args):
+            self.local.profile = None
+            outputs = compute(*args)
+            if all(output is no_update for output in outputs):
+                return outputs + [no_update]
+            profile = self.local.profile
+            return outputs + [report(profile) if profile is not None else 'Served from the cache']
+
+        return callback
+
+    def cascading_callback(self, options):
+        return lambda *values: options.options(self.data_sources, values)
+
+    def conditions(self, filters, args):
+        conditions = []
+        for filter_config, filter in zip(args, filters):
+            if filter.conditions(filter_config) is None:
+                return None
+            conditions += filter.conditions(filter_config)
+        return conditions
+
+    def versions(self, charts, data_sources=None):
+        data_sources = self.data_sources if data_sources is None else data_sources
+        reads = set()
+        for chart in charts:
+            if chart.reads() is None:
+                reads = None
+                break
+            reads |= chart.reads()
+        return {name: data_sources.version(name) for name in data_sources.dictionary
+                if reads is None or data_sources.downstream([name]) & reads}
+
+    def load_id(self):
+        return '%s-load' % self.get_id()
+
+    def versions_id(self):
+        return '%s-versions' % self.get_id()
+
+    def profile_id(self, group):
+        return '%s-profile-%d' % (self.get_id(), group)
+
+    def compute_outputs(self, filters, charts, args):
+        if self.cache is None:
+            return self.compute(filters, charts, args)
+
+        # Keys hold the versions of the data read, so a request started before a change never stores stale results
+        data_sources = self.data_sources.view()
+        key = (self.get_id(), tuple(filter.get_id() for filter in filters), normalize(args),
+               tuple(self.versions(charts, data_sources).items()))
+        outputs_key = ('outputs', tuple(chart.get_id() for chart in charts)) + key
+        outputs = self.cache.get(outputs_key)
+        if outputs is not None:
+            return deserialize(outputs)
+
+        outputs = self.compute(filters, charts, args, key=key, data_sources=data_sources)
+        payload = serialize(outputs)
+        self.cache.set(outputs_key, payload, len(payload))
+        return outputs
 
-        for filter_config, filter in zip(args, self.get_filters()):
-            filter.filter(self.data_sources, filter_config)
+    def compute(self, filters, charts, args, key=None, data_sources=None):
+        start = time.perf_counter()
+        data_sources = self.data_sources.view() if data_sources is None else data_sources
+        data_sources.profile = [] if self.profiler is not None else None
+
+        frames = self.cache.get(('frames',) + key) if key is not None else None
+        if frames is not None:
+            data_sources.restore_filtered(frames)
+            data_sources.record('cache', 'frames', time.perf_counter() - start)
+        else:
+            for filter_config, filter in zip(args, filters):
+                filter_start = time.perf_counter()
+                filter.filter(data_sources, filter_config)
+                if data_sources.profile is not None:
+                    written = filter.writes() or []
+                    data_sources.record('filter', filter.get_id(), time.perf_counter() - filter_start,
+                                        sum(data_sources.count(name) for name in written) if written else None)
+            frames = data_sources.get_filtered() if key is not None else None
+            if frames is not None:
+                self.cache.set(('frames',) + key, frames, frames_size(frames))
+        data_sources.set_conditions(self.conditions(filters, args))
+        partials = self.cache.get(('partials',) + key) if key is not None else None
+        if partials is not None:
+            data_sources.restore_partials(partials)
+
+        stages = data_sources.profile
+        if self.executor is None:
+            results = [timed_callback(chart, data_sources, chart.get_id()) for chart in charts]
+        else:
+            results = self.fan_out(charts, data_sources)
 
         outputs = []
-        for chart in self.get_charts():
-            outputs.append(chart.callback(self.data_sources))
-
+        for chart, (output, elapsed, chart_stages) in zip(charts, results):
+            logger.debug('%s computed in %.1f ms', chart.get_id(), 1000 * elapsed)
+            self.timings[chart.get_id()] = elapsed
+            outputs.append(output)
+            if stages is not None:
+                encode_start = time.perf_counter()
+                size = len(serialize(output))
+                stages += chart_stages + [{'stage': 'encode', 'component': chart.get_id(), 'rows': None, 'bytes': size,
+                                           'seconds': time.perf_counter() - encode_start}]
+
+        partials = data_sources.decomposable_partials()
+        if key is not None and partials:
+            self.cache.set(('partials',) + key, partials, partials_size(partials))
+
+        if stages is not None:
+            self.local.profile = self.profiler.finish(self.get_id(), args, stages, time.perf_counter() - start)
         return outputs
 
-    def add_to_dash_app(self, app, preprocessing=None):
+    def fan_out(self, charts, data_sources):
+        # Filters are applied once for the request, then each chart only receives the frames it reads
+        data_sources.materialize()
+        subsets = [data_sources.subset(chart.reads()) for chart in charts]
+        if not isinstance(self.executor, ProcessPoolExecutor):
+            futures = [self.executor.submit(timed_callback, chart, subset, chart.get_id())
+                       for chart, subset in zip(charts, subsets)]
+            return [future.result() for future in futures]
+
+        # Processes attach the frames from shared memory instead of unpickling a copy for every chart
+        frames = {name: df for subset in subsets for name, df in subset.dictionary.items() if not subset.is_lazy(name)}
+        shared = share(DataSources(frames))
+        try:
+            futures = []
+            for chart, subset in zip(charts, subsets):
+                manifest = {name: shared.manifest[name] for name in subset.dictionary if name in frames}
+                subset.dictionary = {name: table for name, table in subset.dictionary.items() if name not in frames}
+                futures.append(self.executor.submit(shared_callback, chart, subset, manifest, chart.get_id()))
+            return [future.result() for future in futures]
+        finally:
+            shared.unlink()
+
+    def data_changed(self, data_source, rows):
+        # Rows are the ones appended to the data source, or None when it was replaced
+        if self.cache is None:
+            return
+
+        keys = {}
+        for key in self.cache.keys():
+            if key[0] in ('frames', 'partials') and key[1] == self.get_id():
+                keys.setdefault(key[1:], []).append(key)
+            elif key[0] == 'outputs' and key[2] == self.get_id():
+                keys.setdefault(key[2:], []).append(key)
+
+        changed = self.data_sources.downstream([data_source])
+        version = self.data_sources.version(data_source)
+        for key, cached in keys.items():
+            versions = dict(key[3])
+            if data_source not in versions:
+                continue
+            # Only results of the version before an append are updated, older ones were computed from stale data
+            current = rows is not None and versions[data_source] == version - 1
+            new_rows = self.filtered_rows(data_source, rows, key) if current else None
+            updated = tuple((name, version if name == data_source else seen) for name, seen in key[3])
+            for cached_key in cached:
+                new_key = cached_key[:-1] + (updated,)
+                if current and (not any(len(df) for df in new_rows.values()) or
+                                cached_key[0] == 'outputs' and not self.reads_any(cached_key[1], changed)):
+                    self.cache.rename(cached_key, new_key)
+                    continue
+                value = self.cache.pop(cached_key)
+                if not current or cached_key[0] == 'outputs' or changed != {data_source}:
+                    continue
+                # Results of the appended data source alone are updated with its filtered new rows
+                if cached_key[0] == 'frames':
+                    value = {name: pd.concat([df, new_rows[name]]) if name == data_source else df
+                             for name, df in value.items()}
+                    self.cache.set(new_key, value, frames_size(value))
+                else:
+                    value = {(leaf, field): self.merged(leaf, field, result, new_rows)
+                             for (leaf, field), result in value.items()}
+                    self.cache.set(new_key, value, partials_size(value))
+
+    def reads_any(self, chart_ids, data_sources):
+        for chart in self.get_charts():
+            if chart.get_id() in chart_ids and (chart.reads() is None or chart.reads() & data_sources):
+                return True
+        return False
+
+    def filtered_rows(self, data_source, rows, key):
+        # The filters of a cached combination are applied to the new rows alone, without the indexes of the full data
+        data_sources = self.data_sources.view()
+        data_sources.dictionary = dict(data_sources.dictionary)
+        data_sources.dictionary[data_source] = rows
+        data_sources.indexes = {}
+
+        filters = {filter.get_id(): filter for filter in self.get_filters()}
+        for filter_config, filter_id in zip(key[2], key[1]):
+            filters[filter_id].filter(data_sources, filter_config)
+        return {name: data_sources.get(name) for name in self.data_sources.downstream([data_source])}
+
+    def merged(self, leaf, field, result, new_rows):
+        if leaf.data_source not in new_rows:
+            return result
+        df = new_rows[leaf.data_source]
+        return leaf.merge(result, leaf.apply(df) if field is None else leaf.apply_grouped(df, field))
+
+    def add_to_dash_app(self, app, preprocessing=None, fast_json=False, typed_arrays=False, refresh_interval=None,
+                        debug_panel=False):
         if preprocessing is None:
             preprocessing = lambda x: x
-
-        inputs = [Input(filter.get_id(), "value") for filter in self.get_filters()]
-        outputs = [Output(chart.get_id(), chart.get_property()) for chart in self.get_charts()]
-
-        app.callback(*(tuple(outputs) + tuple(inputs)))(preprocessing(self.callback))
+        if typed_arrays and not supports_typed_arrays():
+            logger.warning('The installed plotly.js does not decode typed arrays, sending plain lists')
+            typed_arrays = False
+
+        self.refresh_interval = refresh_interval
+        self.debug_panel = debug_panel and self.profiler is not None
+        if self.profiler is not None:
+            self.profiler.add_to_server(app.server)
+        for filter in self.get_filters():
+            filter.add_to_dash_app(app, self.data_sources)
+        for filters, options in self.cascading:
+            app.callback([Output(filter.get_id(), 'options') for filter in filters],
+                         [Input(filter.get_id(), 'value') for filter in filters])(self.cascading_callback(options))
+
+        if refresh_interval is not None:
+            app.callback(Output(self.versions_id(), 'data'), [Input(self.get_id() + '-interval', 'n_intervals')],
+                         [State(self.versions_id(), 'data')], prevent_initial_call=True)(
+                preprocessing(self.versions_callback()))
+
+        for group, (filters, charts) in enumerate(self.dependencies().items()):
+            inputs = [Input(filter.get_id(), "value") for filter in filters]
+            outputs = [Output(chart.get_id(), chart.get_property()) for chart in charts]
+
+            callback = self.group_callback(filters, charts)
+            if refresh_interval is not None:
+                inputs.append(Input(self.versions_id(), 'data'))
+                callback = self.refresh_callback(filters, charts, callback)
+            elif not filters:
+                inputs.append(Input(self.load_id(), 'data'))
+            if self.debug_panel:
+                outputs.append(Output(self.profile_id(group), 'children'))
+                callback = self.debug_callback(callback)
+
+            registered = set(app.callback_map)
+            callback = preprocessing(callback)
+            app.callback(outputs, inputs)(callback)
+            if fast_json:
+                for callback_id in set(app.callback_map) - registered:
+                    install(app, callback_id, callback, typed_arrays)
@@ -0,0 +1,40 @@
+import pandas as pd
+
+
+class Cube(object):
+    def __init__(self, df, dimensions, field, leaves):
+        self.dimensions = list(dimensions)
+        self.field = field
+        self.leaves = list(leaves)
+        self.table = self.aggregate(df)
+
+    def keys(self):
+        return self.dimensions + ([self.field] if self.field is not None and self.field not in self.dimensions else [])
+
+    def aggregate(self, df):
+        values = pd.DataFrame({i: leaf.values(df) for i, leaf in enumerate(self.leaves)})
+        if not self.keys():
+            return values.sum().to_frame().T
+        # Rows with missing filter values are kept, no filter selects them but they add to unfiltered totals
+        return values.groupby([df[column] for column in self.keys()], observed=True, dropna=False).sum()
+
+    def appended(self, rows):
+        cube = Cube.__new__(Cube)
+        cube.dimensions, cube.field, cube.leaves = self.dimensions, self.field, self.leaves
+        table = pd.concat([self.table, self.aggregate(rows)])
+        cube.table = table.groupby(level=list(range(len(self.keys()))), observed=True, dropna=False).sum() \
+            if self.keys() else table.sum().to_frame().T
+        return cube
+
+    def answers(self, leaf, conditions):
+        return leaf in self.leaves and all(column in self.dimensions for column, values in conditions)
+
+    def answer(self, leaf, conditions):
+        table = self.table
+        for column, values in conditions:
+            table = table[table.index.get_level_values(column).isin(values)]
+        values = table[self.leaves.index(leaf)]
+        if self.field is None:
+            return values.sum()
+        # Like the groups of the rows, cells without a value of the field and unobserved categories are in no group
+        return values.groupby(level=self.field, observed=True, dropna=True).sum()
@@ -1,42 +1,474 @@
+import copy
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from eryx_dash.columnar import ColumnarFile
+from eryx_dash.cubes import Cube
+from eryx_dash.indexes import ColumnIndex, intersect
+from eryx_dash.sql import SQLTable, compiles
+
+
+class KeyJoin(object):
+    def __init__(self, key, dependent_key=None):
+        self.key = key
+        self.dependent_key = key if dependent_key is None else dependent_key
+
+    def __call__(self, data_frame, dependent):
+        return dependent[dependent[self.dependent_key].isin(data_frame[self.key])]
 
 
 class DataSources(object):
     def __init__(self, dictionary, filters=None):
         self.dictionary = dictionary
         self.filters = {} if filters is None else filters
+        self.files = {}
+        self.required = {}
+        self.dimensions = set()
+        self.loaded = {}
+        self.indexes = {}
+        self.cubes = {}
+        self.conditions = None
+        self.filtered = {}
+        self.selected = {}
+        self.pending = set()
+        self.changed = set()
+        self.relations = {}
+        self.grouped = {}
+        self.partials = None
+        self.memo = None
+        self.profile = None
+        self.versions = {}
+        self.listeners = []
+        self.compile_dependencies()
+
+    def compile_dependencies(self):
+        self.dependents = {}
+        for (data_source, dependent), filter in self.filters.items():
+            self.dependents.setdefault(data_source, []).append(((data_source, dependent), filter))
+
+        # Data sources are propagated in topological order, so each one is only filtered once all its upstream are
+        names = list(self.dictionary) + [name for dependence in self.filters for name in dependence
+                                         if name not in self.dictionary]
+        names = list(OrderedDict.fromkeys(names))
+        incoming = {name: 0 for name in names}
+        for data_source, dependent in self.filters:
+            incoming[dependent] += 1
+        ready = [name for name in names if not incoming[name]]
+        self.order = []
+        while ready:
+            name = ready.pop(0)
+            self.order.append(name)
+            for (data_source, dependent), filter in self.dependents.get(name, []):
+                incoming[dependent] -= 1
+                if not incoming[dependent]:
+                    ready.append(dependent)
+        if len(self.order) < len(names):
+            raise Exception('Cyclic dependencies between the data sources %s' %
+                            ', '.join(name for name in names if name not in self.order))
+
+        self.reachable = {}
+        for name in reversed(self.order):
+            self.reachable[name] = {name}.union(*[self.reachable[dependent]
+                                                  for (data_source, dependent), filter in self.dependents.get(name, [])])
+
+    def view(self):
+        # Views share the original frames and only own their filters, so each request can filter its own view
+        view = copy.copy(self)
+        view.filtered = dict(self.filtered)
+        view.selected = dict(self.selected)
+        view.pending = set(self.pending)
+        view.changed = set(self.changed)
+        view.relations = dict(self.relations)
+        view.grouped = {}
+        view.partials = {}
+        view.memo = {}
+        view.versions = dict(self.versions)
+        view.listeners = []
+        return view
+
+    def subset(self, data_sources):
+        # Subsets only hold the frames read, as filtered by this view once it is materialized, without indexes, cubes
+        # or dependencies. Lazy data sources keep their queries
+        names = [name for name in self.dictionary if data_sources is None or name in data_sources]
+        subset = DataSources({name: self.dictionary[name] if self.is_lazy(name) else self.get_current(name)
+                              for name in names})
+        subset.required = self.required
+        subset.filtered = {name: self.filtered[name] for name in names if self.is_lazy(name) and name in self.filtered}
+        subset.relations = {name: self.relations[name] for name in names if name in self.relations}
+        subset.versions = self.versions
+        subset.profile = self.profile
+        subset.partials = self.partials
+        subset.memo = self.memo
+        return subset
+
+    def build_index(self, data_source, column):
+        if self.is_lazy(data_source):
+            return None
+        if self.index(data_source, column) is None:
+            self.indexes[(data_source, column)] = ColumnIndex(self.get_original(data_source)[column])
+        return self.indexes[(data_source, column)]
+
+    def index(self, data_source, column):
+        index = self.indexes.get((data_source, column))
+        # Frames assigned to the dictionary, instead of appended or replaced, leave their indexes selecting positions
+        # of the previous frame
+        if index is not None and index.size != len(self.get_original(data_source)):
+            index = self.indexes[(data_source, column)] = ColumnIndex(self.get_original(data_source)[column])
+        return index
+
+    def build_cube(self, data_source, dimensions, field, leaves):
+        if self.is_lazy(data_source):
+            return None
+        self.cubes[(data_source, field)] = Cube(self.get_original(data_source), dimensions, field, leaves)
+        return self.cubes[(data_source, field)]
 
     def get(self, data_source):
-        if 'group_%s' % data_source in self.dictionary:
-            return self.dictionary['group_%s' % data_source]
-        if 'filtered_%s' % data_source in self.dictionary:
-            return self.dictionary['filtered_%s' % data_source]
-        return self.dictionary[data_source]
+        if self.pending or self.changed:
+            self.propagate([data_source])
+        if data_source in self.grouped:
+            return self.grouped[data_source]
+        return self.get_current(data_source)
+
+    def is_lazy(self, data_source):
+        return isinstance(self.dictionary.get(data_source), SQLTable)
+
+    def relation(self, data_source):
+        if data_source in self.relations:
+            return self.relations[data_source]
+        return self.dictionary[data_source].relation()
+
+    def restrict(self, data_source, column, values):
+        # Filters of lazy data sources are added to the query, rows are only read when a frame is needed
+        self.relations[data_source] = self.relation(data_source).where(column, values)
+        self.changed.add(data_source)
+
+    def rows(self, data_source):
+        relation = self.relation(data_source)
+        return self.memoize(data_source, ('rows', relation.key()),
+                            lambda: relation.to_pandas(self.columns(data_source)))
+
+    def columns(self, data_source):
+        required = self.required.get(data_source)
+        return None if required is None else sorted(required)
+
+    def distinct(self, data_source, columns):
+        if self.is_lazy(data_source):
+            return self.relation(data_source).distinct(columns)
+        return self.get(data_source)
+
+    def query(self, leaves, field):
+        # Declared aggregations of lazy data sources filtered only by their own filters are computed by the engine
+        if self.grouped or not leaves:
+            return None
+        data_source = leaves[0].data_source
+        if self.pending or self.changed:
+            self.propagate([data_source])
+        if not self.is_lazy(data_source) or data_source in self.filtered or \
+                any(leaf.data_source != data_source or not compiles(leaf) for leaf in leaves):
+            return None
+        return self.relation(data_source).aggregate(leaves, field)
 
     def get_original(self, data_source):
+        if isinstance(self.dictionary[data_source], ColumnarFile):
+            self.files[data_source] = self.dictionary[data_source]
+            self.load(data_source)
+        if self.is_lazy(data_source):
+            return self.dictionary[data_source].relation().to_pandas(self.columns(data_source))
         return self.dictionary[data_source]
 
+    def load(self, data_source):
+        self.loaded[data_source] = self.required.get(data_source)
+        self.dictionary[data_source] = self.files[data_source].load(self.loaded[data_source])
+
+    def require(self, columns):
+        # Columnar files only load the (data source, column) pairs required, None requires every column
+        if columns is None:
+            columns = [(name, None) for name in self.dictionary]
+        columns = list(columns) + [(name, None) for dependence in self.filters for name in dependence]
+
+        for data_source, column in columns:
+            required = self.required.get(data_source, set())
+            if required is not None:
+                self.required[data_source] = None if column is None else required | {column}
+
+        for data_source in self.files:
+            loaded, required = self.loaded[data_source], self.required.get(data_source)
+            if loaded is not None and (required is None or not required <= loaded):
+                self.load(data_source)
+
+    def add_dimensions(self, columns):
+        self.dimensions |= set(columns)
+
+    def optimize(self, max_category_ratio=0.5, drop_columns=True, categorize_all=False):
+        # Returns the bytes used by each data source before and after
+        report = {}
+        self.dictionary = dict(self.dictionary)
+        for name in list(self.dictionary):
+            if self.is_lazy(name):
+                continue
+            df = self.get_original(name)
+            before = df.memory_usage(deep=True).sum()
+
+            # Columns are only known to be unused when every tab declared the columns it reads from the data source
+            required = self.required.get(name)
+            if drop_columns and required is not None:
+                df = df[[column for column in df.columns if column in required]]
+            # Metrics implementing compute may use string methods, which categoricals do not have, on other columns
+            df = pd.DataFrame({column: compact(df[column], max_category_ratio,
+                                               categorize_all or (name, column) in self.dimensions)
+                               for column in df.columns}, index=df.index)
+
+            self.files.pop(name, None)
+            self.dictionary[name] = df
+            report[name] = (before, df.memory_usage(deep=True).sum())
+        return report
+
+    def append(self, data_source, rows):
+        # Views keep the frames and indexes they were created with, appending replaces them for the next views
+        original, rows = conformed(self.get_original(data_source), rows)
+        self.files.pop(data_source, None)
+        self.dictionary = dict(self.dictionary)
+        self.dictionary[data_source] = pd.concat([original, rows], ignore_index=isinstance(original.index, pd.RangeIndex))
+        rows = self.dictionary[data_source].iloc[len(original):]
+        self.indexes = {(name, column): index.extended(rows[column]) if name == data_source else index
+                        for (name, column), index in self.indexes.items()}
+        self.cubes = {(name, field): cube.appended(rows) if name == data_source else cube
+                      for (name, field), cube in self.cubes.items()}
+        self.versions[data_source] = self.version(data_source) + 1
+
+        for listener in self.listeners:
+            listener(data_source, rows)
+
+    def replace(self, data_source, data_frame):
+        self.files.pop(data_source, None)
+        self.dictionary = dict(self.dictionary)
+        self.dictionary[data_source] = data_frame
+        self.indexes = {(name, column): ColumnIndex(data_frame[column]) if name == data_source else index
+                        for (name, column), index in self.indexes.items()}
+        self.cubes = {(name, field): Cube(data_frame, cube.dimensions, field, cube.leaves) if name == data_source else cube
+                      for (name, field), cube in self.cubes.items()}
+        self.versions[data_source] = self.version(data_source) + 1
+
+        for listener in self.listeners:
+            listener(data_source, None)
+
+    def version(self, data_source):
+        return self.versions.get(data_source, 0)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
     def dependencies(self, data_source):
-        return [(dependence, filter) for dependence, filter in self.filters.keys() if dependence[0] == data_source]
+        return self.dependents.get(data_source, [])
+
+    def downstream(self, data_sources):
+        return set(data_sources).union(*[self.reachable.get(name, ()) for name in data_sources])
+
+    def select(self, data_source, rows):
+        # Rows are either sorted row positions or a boolean mask, both relative to the original frame
+        if data_source in self.selected:
+            current = self.selected[data_source]
+            if rows.dtype == bool:
+                positions = current[rows[current]]
+            else:
+                positions = intersect(current, rows, len(self.get_original(data_source)))
+        else:
+            positions = np.flatnonzero(rows) if rows.dtype == bool else rows
+
+        if data_source in self.filtered and data_source not in self.selected:
+            df = self.filtered[data_source]
+            self.set_filter(data_source, df[df.index.isin(self.get_original(data_source).index[positions])])
+            return
+        self.selected[data_source] = positions
+        self.pending.add(data_source)
+
+    def where(self, data_source, column, condition):
+        values = self.get_original(data_source)[column]
+        if data_source in self.selected:
+            current = self.selected[data_source]
+            self.select(data_source, current[condition(values.take(current)).to_numpy()])
+        else:
+            self.select(data_source, condition(values).to_numpy())
+
+    def propagate(self, data_sources):
+        # Every data source filtered since the last propagation reaching the ones requested filters its dependents once
+        targets = set(data_sources)
+        for name in self.order:
+            if name not in self.pending and name not in self.changed or not self.reachable[name] & targets:
+                continue
+            dependencies = self.dependencies(name)
+            if name in targets or any(not isinstance(filter, KeyJoin) for dependence, filter in dependencies):
+                self.materialize(name)
+            for (data_source, dependent), filter in dependencies:
+                if isinstance(filter, KeyJoin) and self.is_lazy(dependent):
+                    self.restrict(dependent, filter.dependent_key, self.key_values(name, filter.key))
+                elif isinstance(filter, KeyJoin):
+                    index = self.build_index(dependent, filter.dependent_key)
+                    self.select(dependent, index.mask(self.key_values(name, filter.key)))
+                else:
+                    self.materialize(dependent)
+                    self.set_filter(dependent, filter(self.get_current(name), self.get_current(dependent)))
+            self.changed.discard(name)
+
+    def key_values(self, data_source, column):
+        # Positions selected are enough for the keys, without building the filtered frame
+        if data_source in self.selected:
+            return self.get_original(data_source)[column].take(self.selected[data_source]).unique()
+        if self.is_lazy(data_source) and data_source not in self.filtered:
+            return self.relation(data_source).distinct([column])[column].to_numpy()
+        return self.get_current(data_source)[column].unique()
+
+    def get_current(self, data_source):
+        if data_source in self.filtered:
+            return self.filtered[data_source]
+        if self.is_lazy(data_source):
+            return self.rows(data_source)
+        return self.get_original(data_source)
+
+    def materialize(self, data_source=None):
+        if data_source is None:
+            self.propagate(self.order)
+            return
+        if data_source in self.pending:
+            positions = self.selected[data_source]
+            self.set_filter(data_source, self.get_original(data_source).take(positions))
+            self.selected[data_source] = positions
 
     def set_filter(self, data_source, data_frame):
-        self.dictionary['filtered_%s' % data_source] = data_frame
-        for dependence, filter in self.dependencies(data_source):
-            dependent = self.get(dependence[1])
-            self.set_filter(dependence[1], filter(data_frame, dependent))
+        # Dependents are filtered when they are needed, see propagate
+        self.filtered[data_source] = data_frame
+        self.selected.pop(data_source, None)
+        self.pending.discard(data_source)
+        self.changed.add(data_source)
+
+    def get_filtered(self):
+        self.materialize()
+        # Filters of lazy data sources are part of their queries, not of the frames, which are not enough to restore them
+        if self.relations:
+            return None
+        return dict(self.filtered)
+
+    def restore_filtered(self, frames):
+        self.filtered.update(frames)
+
+    def restore_partials(self, partials):
+        self.partials.update(partials)
+
+    def count(self, data_source):
+        # Selected positions are counted without building the frame, unless filters upstream still have to reach them
+        upstream = {name for name in self.pending | self.changed
+                    if name != data_source and data_source in self.reachable.get(name, ())}
+        if data_source in self.selected and not upstream:
+            return len(self.selected[data_source])
+        if self.pending or self.changed:
+            self.propagate([data_source])
+        if data_source in self.selected:
+            return len(self.selected[data_source])
+        if self.is_lazy(data_source) and data_source not in self.filtered:
+            return self.relation(data_source).count()
+        return len(self.get(data_source))
+
+    def record(self, stage, component, seconds, rows=None, size=None):
+        if self.profile is None:
+            return
+        # Consecutive executions of a stage, like a metric computed for every group, are reported together
+        if self.profile and (self.profile[-1]['stage'], self.profile[-1]['component']) == (stage, component):
+            self.profile[-1]['seconds'] += seconds
+            return
+        self.profile.append({'stage': stage, 'component': component, 'seconds': seconds, 'rows': rows, 'bytes': size})
+
+    def set_conditions(self, conditions):
+        self.conditions = conditions
+
+    def get_partial(self, leaf, field):
+        if self.partials is None or self.grouped:
+            return None
+        if (leaf, field) in self.partials:
+            return self.partials[(leaf, field)]
+
+        # Cubes answer when every filter applied is known and selects values of their dimensions
+        cube = self.cubes.get((leaf.data_source, field))
+        if cube is None or self.conditions is None:
+            return None
+        conditions = []
+        for data_source, column, values in self.conditions:
+            if data_source == leaf.data_source:
+                conditions.append((column, values))
+            elif leaf.data_source in self.downstream([data_source]):
+                return None
+        if not cube.answers(leaf, conditions):
+            return None
+        self.partials[(leaf, field)] = cube.answer(leaf, conditions)
+        return self.partials[(leaf, field)]
+
+    def set_partial(self, leaf, field, result):
+        # Views keep the results of the aggregations over their filtered rows, so every chart of a request shares them
+        if self.partials is not None and not self.grouped:
+            self.partials[(leaf, field)] = result
+
+    def decomposable_partials(self):
+        # Only these ones can be updated when rows are appended, so they are the ones kept between requests
+        return {(leaf, field): result for (leaf, field), result in (self.partials or {}).items() if leaf.decomposable}
+
+    def memoize(self, data_source, key, function):
+        if self.memo is None or self.grouped:
+            return function()
+        key = (data_source, self.version(data_source), key)
+        if key not in self.memo:
+            self.memo[key] = function()
+        return self.memo[key]
 
     def set_group_filter(self, data_source, data_frame):
-        self.dictionary['group_%s' % data_source] = data_frame
+        self.grouped[data_source] = data_frame
 
     def clear_group_filter(self):
-        to_clear = [key for key in self.dictionary.keys() if key.startswith('group_')]
-        for key in to_clear:
-            self.dictionary.pop(key)
+        self.grouped.clear()
 
     def clear_filter(self):
-        to_clear = [key for key in self.dictionary.keys() if key.startswith('filtered_') ]
-        for key in to_clear:
-            self.dictionary.pop(key)
+        self.filtered.clear()
+        self.selected.clear()
+        self.pending.clear()
+        self.changed.clear()
+        self.relations.clear()
+        if self.partials is not None:
+            self.partials.clear()
+            self.memo.clear()
 
     def clear(self):
         self.clear_filter()
         self.clear_group_filter()
+
+
+def compact(column, max_category_ratio, categorize=True):
+    if column.dtype == object:
+        if categorize and len(column) and column.nunique() <= max_category_ratio * len(column):
+            return column.astype('category')
+        return column
+    if column.dtype.kind in 'iu':
+        return pd.to_numeric(column, downcast='integer' if column.dtype.kind == 'i' else 'unsigned')
+    if column.dtype == np.float64:
+        # Floats are only downcast when no value changes, like prices with cents do
+        downcast = column.astype(np.float32)
+        if np.array_equal(downcast.to_numpy(np.float64), column.to_numpy(), equal_nan=True):
+            return downcast
+    return column
+
+
+def conformed(original, rows):
+    # Appended rows take the columns and dtypes of the frame, which are only widened when the new values do not fit
+    original = original.copy(deep=False)
+    columns = {}
+    for column in [column for column in rows.columns if column in original.columns]:
+        dtype, values = original[column].dtype, rows[column]
+        if isinstance(dtype, pd.CategoricalDtype):
+            new_categories = pd.Index(values.dropna().unique()).difference(dtype.categories, sort=False)
+            if len(new_categories):
+                original[column] = original[column].cat.add_categories(new_categories)
+            values = values.astype(original[column].dtype)
+        elif dtype.kind in 'iuf' and values.dtype.kind in 'iuf':
+            widened = np.promote_types(dtype, compact(values, 0).dtype)
+            if widened != dtype:
+                original[column] = original[column].astype(widened)
+            values = values.astype(widened)
+        columns[column] = values
+    return original, pd.DataFrame(columns, index=rows.index)
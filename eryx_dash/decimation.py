@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+POINT_SPACING = 3
+
+
+def target_points(max_points=None, width=1200):
+    return max_points if max_points is not None else width // POINT_SPACING
+
+
+def numeric_axis(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=int)
+
+    # Points between the first and the last are split in threshold - 2 buckets, each one keeps the point forming the
+    # largest triangle with the point kept in the previous bucket and the average of the next one
+    edges = np.append(np.linspace(1, n - 1, threshold - 1).astype(int), n)
+    selected = [0]
+    for i in range(threshold - 2):
+        start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+        a = selected[-1]
+        average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a]))
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+def min_max(x, y, threshold):
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    # The first and the last points are always kept, and the points between them are split in buckets keeping their
+    # minimum and maximum, so no more than threshold points are kept
+    buckets = (threshold - 2) // 2
+    if buckets < 1:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=int)
+
+    edges = np.linspace(1, n - 1, buckets + 1).astype(int)
+    selected = {0, n - 1}
+    for start, end in zip(edges[:-1], edges[1:]):
+        selected.update((start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))))
+    return np.array(sorted(selected))
+
+
+def decimate(data, x_axis, y_axes, max_points, method='lttb'):
+    if len(data) <= max_points:
+        return data
+
+    x = numeric_axis(data[x_axis])
+    function = {'lttb': lttb, 'minmax': min_max}[method]
+    selected = set()
+    for y_axis in y_axes:
+        y = np.nan_to_num(data[y_axis].to_numpy(dtype=float))
+        selected.update(function(x, y, max_points // len(y_axes)))
+    return data.iloc[sorted(selected)]
@@ -1,5 +1,8 @@
+import numpy as np
 from millify import millify
 
+MILLNAMES = ['', 'k', 'M', 'B', 'T', 'P', 'E', 'Z', 'Y']
+
 
 def format_money(number):
     return '$' + millify(number, precision=2)
@@ -15,3 +18,29 @@ def format_integer(number):
 
 def format_large_integer(number):
     return millify(number)
+
+
+def millify_many(numbers, precision=0):
+    # Same text as millify for every number, with the magnitudes and scaling computed on the whole array at once
+    numbers = np.asarray(numbers, dtype=float)
+    magnitudes = np.log10(np.abs(numbers), out=np.zeros_like(numbers), where=numbers != 0)
+    exponents = np.clip(np.nan_to_num(np.floor(magnitudes / 3)), 0, len(MILLNAMES) - 1).astype(int)
+    scaled = (numbers / 10.0 ** (3 * exponents)).tolist()
+    suffixes = np.array(MILLNAMES)[exponents].tolist()
+
+    template = '%.' + str(precision) + 'f'
+    if precision:
+        return [(template % number).rstrip('0').rstrip('.') + suffix for number, suffix in zip(scaled, suffixes)]
+    return [template % number + suffix for number, suffix in zip(scaled, suffixes)]
+
+
+def format_money_many(numbers):
+    return ['$' + text for text in millify_many(numbers, precision=2)]
+
+
+def format_percentage_many(numbers):
+    return ['%.0f%%' % number for number in (100 * np.asarray(numbers, dtype=float)).tolist()]
+
+
+def format_number_many(numbers):
+    return [str(number) for number in np.asarray(numbers, dtype=float).astype(int).tolist()]
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+
+class ColumnIndex(object):
+    def __init__(self, column):
+        codes, categories = pd.factorize(column)
+        self.size = len(codes)
+        self.categories = pd.Index(categories)
+        self.positions = group_positions(codes, len(self.categories))
+
+    def extended(self, column):
+        # Appended rows only add positions after the current ones, so each value keeps its sorted positions and gets
+        # the new ones concatenated at the end
+        new_categories = pd.Index(column.dropna().unique()).difference(self.categories, sort=False)
+        index = ColumnIndex.__new__(ColumnIndex)
+        index.size = self.size + len(column)
+        index.categories = self.categories.append(new_categories)
+        index.positions = self.positions + [np.empty(0, dtype=np.intp) for _ in new_categories]
+
+        codes = index.categories.get_indexer(column)
+        for code, positions in enumerate(group_positions(codes, len(index.categories))):
+            if len(positions):
+                index.positions[code] = np.concatenate([index.positions[code], self.size + positions])
+        return index
+
+    def lookup(self, values):
+        codes = self.categories.get_indexer(values)
+        chunks = [self.positions[code] for code in np.unique(codes[codes >= 0])]
+        if len(chunks) == 1:
+            return chunks[0]
+        return np.flatnonzero(self.mask(values))
+
+    def mask(self, values):
+        codes = self.categories.get_indexer(values)
+        selected = np.zeros(self.size, dtype=bool)
+        for code in np.unique(codes[codes >= 0]):
+            selected[self.positions[code]] = True
+        return selected
+
+
+def group_positions(codes, count):
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=count)
+    # Missing values have code -1 and are sorted first, no filter value can select them
+    return np.split(order[len(codes) - counts.sum():], np.cumsum(counts)[:-1])
+
+
+def intersect(positions, other, size):
+    selected = np.zeros(size, dtype=bool)
+    selected[other] = True
+    return positions[selected[positions]]
@@ -1,4 +1,7 @@
-from eryx_dash.formats import format_money
+import plotly.graph_objs as go
+from eryx_dash.formats import format_money, format_money_many, format_number_many, format_percentage_many
+
+VALIDATE = True
 
 
 def update_layout(fig):
@@ -70,26 +73,69 @@ def customize_figure(fig, title=None, height=None):
     return fig
 
 
+FORMAT_TEMPLATES = {
+    'money': {
+        'format_text': '$%{y:.3s}',
+        'format_hover': '$%{y:.3s} | %{x}',
+        'format_tick': '$2s',
+        'format_annotation': lambda x: format_money(x),
+        'format_annotations': format_money_many,
+    },
+    'number': {
+        'format_text': '%{text:.d}',
+        'format_hover': '%{y:.d} | %{x}',
+        'format_tick': 'd',
+        'format_annotation': lambda x: int(x),
+        'format_annotations': format_number_many,
+    },
+    'percentage': {
+        'format_text': '%{text:.0%}',
+        'format_hover': '%{y:.0%} | %{x}',
+        'format_tick': '%',
+        'format_annotation': lambda x: '%.0f%%' % (100 * x),
+        'format_annotations': format_percentage_many,
+    },
+}
+
+
 def format_templates(format_type):
-    all_templates = {
-        'money': {
-            'format_text': '$%{y:.3s}',
-            'format_hover': '$%{y:.3s} | %{x}',
-            'format_tick': '$2s',
-            'format_annotation': lambda x: format_money(x),
-        },
-        'number': {
-            'format_text': '%{text:.d}',
-            'format_hover': '%{y:.d} | %{x}',
-            'format_tick': 'd',
-            'format_annotation': lambda x: int(x),
-        },
-        'percentage': {
-            'format_text': '%{text:.0%}',
-            'format_hover': '%{y:.0%} | %{x}',
-            'format_tick': '%',
-            'format_annotation': lambda x: '%.0f%%' % (100 * x),
-        },
-    }
-
-    return all_templates[format_type]
+    return FORMAT_TEMPLATES[format_type]
+
+
+def validate_figures(enabled):
+    # Without validation the plots are returned as plain figure dicts, which Dash serializes as they are
+    global VALIDATE
+    VALIDATE = enabled
+
+
+def merge(*layouts):
+    merged = {}
+    for layout in layouts:
+        for key, value in layout.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = merge(merged[key], value)
+            elif isinstance(value, dict):
+                merged[key] = merge(value)
+            else:
+                merged[key] = value
+    return merged
+
+
+def figure(data, layout=None, title=None, height=None, base=None):
+    customization = {}
+    if title is not None:
+        customization['title'] = {'text': title, 'y': 1, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'}
+    if height is not None:
+        customization['height'] = height
+
+    fig = {'data': data, 'layout': merge(base or {}, THEME, layout or {}, customization)}
+    return go.Figure(fig) if VALIDATE else fig
+
+
+THEME = update_layout(go.Figure()).to_plotly_json()['layout']
+
+SECONDARY_Y_LAYOUT = {
+    'xaxis': {'anchor': 'y', 'domain': [0.0, 0.94]},
+    'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0]},
+    'yaxis2': {'anchor': 'x', 'overlaying': 'y', 'side': 'right'},
+}
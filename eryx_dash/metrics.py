@@ -1,41 +1,234 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
 from eryx_dash.formats import format_money, format_percentage, format_integer, format_large_integer
 
+# Metrics may be computed by several threads at once, a module lock is not pickled with the metrics sent to processes
+STATS_LOCK = threading.Lock()
 
-class Metric(object):
-    def compute(self, *args, **kwargs):
+
+class Aggregation(object):
+    def leaves(self):
         raise Exception("Subclass responsibility")
 
-    def formatted(self, *args, **kwargs):
+    def combine(self, results):
         raise Exception("Subclass responsibility")
 
+    def reads(self):
+        return {leaf.data_source for leaf in self.leaves()}
 
-class MoneyMetric(object):
-    def compute(self, *args, **kwargs):
-        raise Exception("Subclass responsibility")
+    def columns(self):
+        return {(leaf.data_source, column) for leaf in self.leaves()
+                for column in ([leaf.column] if leaf.column is not None else []) + list(leaf.where)}
 
-    def formatted(self, *args, **kwargs):
-        return format_money(self.compute(*args, **kwargs))
+    def compute(self, data_sources):
+        results = {leaf: data_sources.get_partial(leaf, None) for leaf in self.leaves()}
+        missing = [leaf for leaf in results if results[leaf] is None]
+        for data_source in dict.fromkeys(leaf.data_source for leaf in missing):
+            leaves = [leaf for leaf in missing if leaf.data_source == data_source]
+            queried = data_sources.query(leaves, None) or {}
+            for leaf in leaves:
+                results[leaf] = queried[leaf] if leaf in queried else leaf.apply(data_sources.get(data_source))
+                data_sources.set_partial(leaf, None, results[leaf])
+        return self.combine(results)
 
 
-class PercentageMetric(object):
-    def compute(self, *args, **kwargs):
-        raise Exception("Subclass responsibility")
+class ColumnAggregation(Aggregation):
+    function = None
+    decomposable = False
 
-    def formatted(self, *args, **kwargs):
-        return format_percentage(self.compute(*args, **kwargs))
+    def __init__(self, data_source, column=None, where=None):
+        self.data_source = data_source
+        self.column = column
+        self.where = {} if where is None else where
 
+    def key(self):
+        where = tuple(sorted((column, tuple(sorted(value)) if isinstance(value, (list, tuple, set)) else value)
+                             for column, value in self.where.items()))
+        return self.__class__.__name__, self.data_source, self.column, where
 
-class IntegerMetric(object):
-    def compute(self, *args, **kwargs):
-        raise Exception("Subclass responsibility")
+    def __eq__(self, other):
+        return isinstance(other, ColumnAggregation) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def leaves(self):
+        return [self]
+
+    def combine(self, results):
+        return results[self]
+
+    def mask(self, df):
+        mask = None
+        for column, value in self.where.items():
+            condition = df[column].isin(value) if isinstance(value, (list, tuple, set)) else df[column] == value
+            mask = condition if mask is None else mask & condition
+        return mask
+
+    def values(self, df):
+        mask = self.mask(df)
+        return df[self.column] if mask is None else df[self.column].where(mask)
+
+    def apply(self, df):
+        return getattr(self.values(df), self.function)()
+
+    def apply_grouped(self, df, field):
+        return self.values(df).groupby(df[field], observed=True).agg(self.function)
+
+    def merge(self, result, delta):
+        # Only decomposable aggregations can add the result of the appended rows to the previous one
+        if not isinstance(result, pd.Series):
+            return result + delta
+        return result.add(delta, fill_value=0).astype(np.result_type(result.dtype, delta.dtype))
+
+
+class Sum(ColumnAggregation):
+    function = 'sum'
+    decomposable = True
+
+
+class Mean(ColumnAggregation):
+    function = 'mean'
+
+
+class NUnique(ColumnAggregation):
+    function = 'nunique'
+
+
+class Count(ColumnAggregation):
+    function = 'sum'
+    decomposable = True
+
+    def __init__(self, data_source, where=None):
+        super(Count, self).__init__(data_source, where=where)
+
+    def values(self, df):
+        mask = self.mask(df)
+        return pd.Series(1, index=df.index) if mask is None else mask.astype(int)
 
-    def formatted(self, *args, **kwargs):
-        return format_integer(self.compute(*args, **kwargs))
 
+class Ratio(Aggregation):
+    def __init__(self, numerator, denominator):
+        self.numerator = numerator
+        self.denominator = denominator
 
-class LargeIntegerMetric(object):
-    def compute(self, *args, **kwargs):
+    def leaves(self):
+        return self.numerator.leaves() + self.denominator.leaves()
+
+    def combine(self, results):
+        return self.numerator.combine(results) / self.denominator.combine(results)
+
+
+def compute_grouped(metrics, data_sources, data_source, field):
+    declarative = [metric for metric in metrics
+                   if metric.aggregation() is not None and metric.aggregation().reads() == {data_source}]
+    opaque = [metric for metric in metrics if metric not in declarative]
+
+    columns = []
+    if declarative:
+        leaves = list(dict.fromkeys(leaf for metric in declarative for leaf in metric.aggregation().leaves()))
+        results = {leaf: data_sources.get_partial(leaf, field) for leaf in leaves}
+        missing = [leaf for leaf in leaves if results[leaf] is None]
+        queried = data_sources.query(missing, field)
+        if queried is not None:
+            for leaf in missing:
+                results[leaf] = queried[leaf]
+                data_sources.set_partial(leaf, field, results[leaf])
+        elif missing:
+            df = data_sources.get(data_source)
+            names = {leaf: '_%d' % i for i, leaf in enumerate(missing)}
+            values = pd.DataFrame({names[leaf]: data_sources.memoize(data_source, ('values', leaf), lambda: leaf.values(df))
+                                   for leaf in missing})
+            grouped = values.groupby(df[field], observed=True).agg(**{names[leaf]: (names[leaf], leaf.function) for leaf in missing})
+            for leaf in missing:
+                results[leaf] = grouped[names[leaf]]
+                data_sources.set_partial(leaf, field, results[leaf])
+        columns += [metric.aggregation().combine(results).rename(metric.name()) for metric in declarative]
+
+    for metric in opaque:
+        def compute_group(group):
+            data_sources.set_group_filter(data_source, group)
+            value = metric.value(data_sources)
+            data_sources.clear_group_filter()
+            return value
+
+        columns.append(data_sources.get(data_source).groupby(field, observed=True).apply(compute_group).rename(metric.name()))
+
+    return pd.concat(columns, axis=1)[[metric.name() for metric in metrics]]
+
+
+class Metric(object):
+    calls = 0
+    seconds = 0.0
+
+    def aggregation(self):
+        return None
+
+    def key(self):
+        # Instances of a metric with the same name only share their values when they have the same parameters
+        parameters = tuple(sorted((name, repr(value)) for name, value in vars(self).items()
+                                  if name not in ('calls', 'seconds')))
+        return (self.__class__.__name__, self.name()) + parameters
+
+    def reads(self):
+        return None if self.aggregation() is None else self.aggregation().reads()
+
+    def columns(self):
+        return None if self.aggregation() is None else self.aggregation().columns()
+
+    def compute(self, data_sources):
+        if self.aggregation() is None:
+            raise Exception("Subclass responsibility")
+        return self.aggregation().compute(data_sources)
+
+    def value(self, data_sources, *args, **kwargs):
+        # Declared metrics share their aggregations, computed ones are shared by the metrics with the same key, as long
+        # as the data sources they read keep their versions. Extra arguments of compute are not part of the key, so
+        # those values are never shared
+        if self.aggregation() is None and not args and not kwargs:
+            reads = data_sources.dictionary if self.reads() is None else self.reads()
+            versions = tuple((name, data_sources.version(name)) for name in sorted(reads))
+            return data_sources.memoize(None, ('metric', versions) + self.key(), lambda: self.timed(data_sources))
+        return self.timed(data_sources, *args, **kwargs)
+
+    def timed(self, data_sources, *args, **kwargs):
+        start = time.perf_counter()
+        value = self.compute(data_sources, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        with STATS_LOCK:
+            self.calls += 1
+            self.seconds += elapsed
+        data_sources.record('metric', self.name(), elapsed)
+        return value
+
+    def stats(self):
+        with STATS_LOCK:
+            return {'calls': self.calls, 'seconds': self.seconds}
+
+    def format(self, value):
         raise Exception("Subclass responsibility")
 
     def formatted(self, *args, **kwargs):
-        return format_large_integer(self.compute(*args, **kwargs))
+        return self.format(self.value(*args, **kwargs))
+
+
+class MoneyMetric(Metric):
+    def format(self, value):
+        return format_money(value)
+
+
+class PercentageMetric(Metric):
+    def format(self, value):
+        return format_percentage(value)
+
+
+class IntegerMetric(Metric):
+    def format(self, value):
+        return format_integer(value)
+
+
+class LargeIntegerMetric(Metric):
+    def format(self, value):
+        return format_large_integer(value)
@@ -1,14 +1,32 @@
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
+import math
 import random
 import plotly.graph_objs as go
 import plotly.express as px
 import plotly as py
 import numpy as np
-from eryx_dash.layout import update_layout, customize_figure, format_templates
+from eryx_dash.layout import update_layout, format_templates, figure, merge, SECONDARY_Y_LAYOUT
 from eryx_dash.formats import format_money
-from plotly.subplots import make_subplots
+
+
+ANNOTATION_FONT = dict(family='Lato', size=14, color='rgb(255, 255, 255)')
+TEXT_FONT = dict(family='Lato', size=12, color='white')
+BAR_MARKER = {'color': 'rgb(112, 176, 224)', 'line': dict(color='rgb(112, 176, 224)', width=3)}
+
+
+def annotation_step(length, skip_ticks=None, max_annotations=None):
+    if skip_ticks is not None:
+        return skip_ticks
+    if max_annotations is not None and length > max_annotations:
+        return math.ceil(length / max_annotations)
+    return 1
+
+
+def value_annotations(x, y, values, format_annotations, step=1):
+    return [dict(xref='x', yref='y', x=xd, y=yd, text=text, font=ANNOTATION_FONT, showarrow=False)
+            for xd, yd, text in zip(x[::step], y[::step], format_annotations(values[::step]))]
 
 
 def empty_card(title, an_id):
@@ -38,13 +56,15 @@ def card_chart(title, number):
 
 
 def pie_chart(data, x_axis, y_axis, height=250, title=None):
-    fig = go.Figure(data=[go.Pie(labels=data[x_axis], values=data[y_axis])])
-
-    fig.update_traces(hoverinfo='label+percent', textinfo='percent', textfont_size=12, textposition='inside')
-
-    fig = update_layout(fig)
-    fig = customize_figure(fig, title, height)
-    return fig
+    return figure([{
+        'type': 'pie',
+        'labels': data[x_axis],
+        'values': data[y_axis],
+        'hoverinfo': 'label+percent',
+        'textinfo': 'percent',
+        'textfont': {'size': 12},
+        'textposition': 'inside',
+    }], title=title, height=height)
 
 
 def treemap_chart(data, path, values, color, height=400, title=None):
@@ -54,264 +74,164 @@ def treemap_chart(data, path, values, color, height=400, title=None):
         values=values,
         color=color,
         color_discrete_sequence=px.colors.sequential.Plasma_r
-    )
+    ).to_plotly_json()
 
-    fig.update_layout(
-        showlegend=False
-    )
-
-    fig = update_layout(fig)
-    fig = customize_figure(fig, title, height)
-
-    return fig
+    return figure(fig['data'], {'showlegend': False}, title, height, base=fig['layout'])
 
 
-def bar_chart(data, x_axis, y_axis, height=None, skip_ticks=None, title=None, format='number', x_tick_format='"%d %b"'):
+def bar_chart(data, x_axis, y_axis, height=None, skip_ticks=None, title=None, format='number', x_tick_format='"%d %b"',
+              max_annotations=None):
     format = format_templates(format)
 
-    fig = go.Figure(go.Bar(
-        x=data[x_axis],
-        y=data[y_axis],
-        hovertemplate=format['format_hover'],
-        marker={'color': 'rgb(112, 176, 224)', 'line': dict(color='rgb(112, 176, 224)', width=3)}))
-
-    annotations = []
-
-    i = 0
-    for xd, yd in zip(data[x_axis], data[y_axis]):
-        if skip_ticks is None or i % skip_ticks == 0:
-            annotations.append(dict(xref='x1', yref='y1',
-                                    x=xd, y=yd + (data[y_axis].mean() * 0.15),
-                                    text=format['format_annotation'](yd),
-                                    font=dict(family='Lato', size=14,
-                                              color='rgb(255, 255, 255)'),
-                                    showarrow=False))
-        i += 1
-
-    fig.update_layout(
-        showlegend=False,
-        annotations=annotations,
-    )
-
-    fig = update_layout(fig)
-    fig = customize_figure(fig, title, height)
-    fig.update_xaxes(tickformat=x_tick_format)
-    fig.update_yaxes(tickformat=format['format_tick'])
-
-    return fig
-
-
-def hbar_chart(data, x_axis, y_axis, height=None, title=None, format='money'):
+    values = data[y_axis]
+    annotations = value_annotations(data[x_axis].tolist(), (values + values.mean() * 0.15).tolist(), values.tolist(),
+                                     format['format_annotations'], annotation_step(len(data), skip_ticks, max_annotations))
+
+    return figure([{
+        'type': 'bar',
+        'x': data[x_axis],
+        'y': data[y_axis],
+        'hovertemplate': format['format_hover'],
+        'marker': BAR_MARKER,
+    }], {
+        'showlegend': False,
+        'annotations': annotations,
+        'xaxis': {'tickformat': x_tick_format},
+        'yaxis': {'tickformat': format['format_tick']},
+        'yaxis2': {'tickformat': format['format_tick']},
+    }, title, height)
+
+
+def hbar_chart(data, x_axis, y_axis, height=None, title=None, format='money', max_annotations=None):
     format = format_templates(format)
 
-    fig = go.Figure(go.Bar(
-        x=data[x_axis],
-        y=data[y_axis],
-        hovertemplate=format['format_hover'].replace('y', 'X').replace('x', 'y').replace('X', 'x'),
-        orientation='h',
-        marker={'color': 'rgb(112, 176, 224)', 'line': dict(color='rgb(112, 176, 224)', width=3)}))
-
-    annotations = []
-
-    for yd, xd in zip(data[x_axis], data[y_axis]):
-        annotations.append(dict(xref='x1', yref='y1',
-                                y=xd, x=yd + (data[x_axis].mean() * 0.1),
-                                text=format['format_annotation'](yd),
-                                font=dict(family='Lato', size=14,
-                                          color='rgb(255, 255, 255)'),
-                                showarrow=False))
-
-    fig = update_layout(fig)
-
-    fig.update_layout(
-        showlegend=False,
-        annotations=annotations,
-    )
-
-    fig.update_xaxes(tickformat=format['format_tick'], nticks=2)
-    fig = customize_figure(fig, title, height)
+    values = data[x_axis]
+    annotations = value_annotations((values + values.mean() * 0.1).tolist(), data[y_axis].tolist(), values.tolist(),
+                                    format['format_annotations'], annotation_step(len(data), None, max_annotations))
+
+    return figure([{
+        'type': 'bar',
+        'x': data[x_axis],
+        'y': data[y_axis],
+        'hovertemplate': format['format_hover'].replace('y', 'X').replace('x', 'y').replace('X', 'x'),
+        'orientation': 'h',
+        'marker': BAR_MARKER,
+    }], {
+        'showlegend': False,
+        'annotations': annotations,
+        'xaxis': {'tickformat': format['format_tick'], 'nticks': 2},
+    }, title, height)
+
+
+def secondary_y_layout(data, primary_axis, secondary_axis, format_primary, format_secondary, format_x_axis,
+                       secondary_y_axis):
+    if secondary_y_axis:
+        ranges = {'yaxis': {'range': [0, data[primary_axis].max() * 1.35]},
+                  'yaxis2': {'range': [0, data[secondary_axis].max() * 1.35]}}
+    else:
+        ranges = {'yaxis': {'range': [0, max(data[primary_axis].max() * 1.35, data[secondary_axis].max() * 1.35)]}}
 
-    return fig
+    return merge(SECONDARY_Y_LAYOUT, {
+        'yaxis': {'tickformat': format_primary['format_tick']},
+        'yaxis2': {'tickformat': format_secondary['format_tick']},
+        'xaxis': {'tickformat': format_x_axis},
+        'legend': {'yanchor': 'top', 'y': 0.95, 'xanchor': 'left', 'x': 0, 'orientation': 'h'},
+    }, ranges)
 
 
 def line_line_chart(data, x_axis, line_1_axis, line_2_axis, line_1_legend, line_2_legend, title=None, height=290,
                    format_bar='money', format_line='percentage', format_x_axis='d', secondary_y_axis=True):
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-
     format_bar = format_templates(format_bar)
     format_line = format_templates(format_line)
 
-    fig.add_trace(
-        go.Scatter(
-            name=line_2_legend,
-            x=data[x_axis],
-            y=data[line_2_axis],
-            text=data[line_2_axis],
-            mode='lines+markers+text',
-            textposition="top right",
-            hovertemplate=format_line['format_hover'],
-            textfont=dict(
-                family="Lato",
-                size=12,
-                color="white"
-            ),
-            line=dict(color='rgb(252, 183, 20)', width=4),
-            connectgaps=True,
-            line_shape='linear',
-            texttemplate=format_line['format_text']),
-        secondary_y=secondary_y_axis)
-
-    fig.add_trace(
-        go.Scatter(
-            name=line_1_axis,
-            x=data[x_axis],
-            y=data[line_1_axis],
-            text=data[line_1_axis],
-            texttemplate=format_bar['format_text'],
-            textposition='top right',
-            mode='lines+markers+text',
-            hovertemplate=format_bar['format_hover'],
-            textfont=dict(
-                family="Lato",
-                size=12,
-                color="white"
-            ),
-            marker={'color': 'rgb(112, 176, 224)', 'line': dict(color='rgb(112, 176, 224)', width=3)}
-        ))
-
-    fig = update_layout(fig)
-
-    fig.update_layout(yaxis_tickformat=format_bar['format_tick'])
-    fig.update_layout(yaxis2_tickformat=format_line['format_tick'])
-    fig.update_layout(xaxis_tickformat=format_x_axis)
-
-    fig = customize_figure(fig, title, height)
-
-    fig.update_layout(legend=dict(
-        yanchor="top",
-        y=0.95,
-        xanchor="left",
-        x=0,
-        orientation="h",
-    ))
-
-    if secondary_y_axis:
-        fig.update_layout(yaxis={'range': (0, data[line_1_axis].max() * 1.35)}, yaxis2={'range': (0, data[line_2_axis].max() * 1.35)})
-    else:
-        fig.update_layout(yaxis={'range': (0, max(data[line_1_axis].max() * 1.35, data[line_2_axis].max() * 1.35))})
-
-    return fig
+    return figure([{
+        'type': 'scatter',
+        'name': line_2_legend,
+        'x': data[x_axis],
+        'y': data[line_2_axis],
+        'text': data[line_2_axis],
+        'mode': 'lines+markers+text',
+        'textposition': 'top right',
+        'hovertemplate': format_line['format_hover'],
+        'textfont': TEXT_FONT,
+        'line': {'color': 'rgb(252, 183, 20)', 'width': 4, 'shape': 'linear'},
+        'connectgaps': True,
+        'texttemplate': format_line['format_text'],
+        'xaxis': 'x',
+        'yaxis': 'y2' if secondary_y_axis else 'y',
+    }, {
+        'type': 'scatter',
+        'name': line_1_axis,
+        'x': data[x_axis],
+        'y': data[line_1_axis],
+        'text': data[line_1_axis],
+        'texttemplate': format_bar['format_text'],
+        'textposition': 'top right',
+        'mode': 'lines+markers+text',
+        'hovertemplate': format_bar['format_hover'],
+        'textfont': TEXT_FONT,
+        'marker': BAR_MARKER,
+    }], secondary_y_layout(data, line_1_axis, line_2_axis, format_bar, format_line, format_x_axis, secondary_y_axis),
+        title, height)
 
 
 def bar_line_chart(data, x_axis, bar_axis, line_axis, bar_legend, line_legend, title=None, height=290,
                    format_bar='money', format_line='percentage', format_x_axis='d', secondary_y_axis=True):
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-
     format_bar = format_templates(format_bar)
     format_line = format_templates(format_line)
 
-    fig.add_trace(
-        go.Scatter(
-            name=line_legend,
-            x=data[x_axis],
-            y=data[line_axis],
-            text=data[line_axis],
-            mode='lines+markers+text',
-            textposition="top right",
-            hovertemplate=format_line['format_hover'],
-            textfont=dict(
-                family="Lato",
-                size=12,
-                color="white"
-            ),
-            line=dict(color='rgb(252, 183, 20)', width=4),
-            connectgaps=True,
-            line_shape='linear',
-            texttemplate=format_line['format_text']),
-        secondary_y=secondary_y_axis)
-
-    fig.add_trace(
-        go.Bar(
-            name=bar_legend,
-            x=data[x_axis],
-            y=data[bar_axis],
-            text=data[bar_axis],
-            texttemplate=format_bar['format_text'], textposition='outside',
-            hovertemplate=format_bar['format_hover'],
-            textfont=dict(
-                family="Lato",
-                size=12,
-                color="white"
-            ),
-            marker={'color': 'rgb(112, 176, 224)', 'line': dict(color='rgb(112, 176, 224)', width=3)}
-        ))
-
-    fig = update_layout(fig)
-
-    fig.update_layout(yaxis_tickformat=format_bar['format_tick'])
-    fig.update_layout(yaxis2_tickformat=format_line['format_tick'])
-    fig.update_layout(xaxis_tickformat=format_x_axis)
-
-    fig = customize_figure(fig, title, height)
-
-    fig.update_layout(legend=dict(
-        yanchor="top",
-        y=0.95,
-        xanchor="left",
-        x=0,
-        orientation="h",
-    ))
-
-    if secondary_y_axis:
-        fig.update_layout(yaxis={'range': (0, data[bar_axis].max() * 1.35)}, yaxis2={'range': (0, data[line_axis].max() * 1.35)})
-    else:
-        fig.update_layout(yaxis={'range': (0, max(data[bar_axis].max() * 1.35, data[line_axis].max() * 1.35))})
-
-    return fig
-
-
-def line_chart(data, x_axis, y_axis, height=None, skip_ticks=None, title=None, format='money'):
-    fig = go.Figure()
-
+    return figure([{
+        'type': 'scatter',
+        'name': line_legend,
+        'x': data[x_axis],
+        'y': data[line_axis],
+        'text': data[line_axis],
+        'mode': 'lines+markers+text',
+        'textposition': 'top right',
+        'hovertemplate': format_line['format_hover'],
+        'textfont': TEXT_FONT,
+        'line': {'color': 'rgb(252, 183, 20)', 'width': 4, 'shape': 'linear'},
+        'connectgaps': True,
+        'texttemplate': format_line['format_text'],
+        'xaxis': 'x',
+        'yaxis': 'y2' if secondary_y_axis else 'y',
+    }, {
+        'type': 'bar',
+        'name': bar_legend,
+        'x': data[x_axis],
+        'y': data[bar_axis],
+        'text': data[bar_axis],
+        'texttemplate': format_bar['format_text'],
+        'textposition': 'outside',
+        'hovertemplate': format_bar['format_hover'],
+        'textfont': TEXT_FONT,
+        'marker': BAR_MARKER,
+    }], secondary_y_layout(data, bar_axis, line_axis, format_bar, format_line, format_x_axis, secondary_y_axis),
+        title, height)
+
+
+def line_chart(data, x_axis, y_axis, height=None, skip_ticks=None, title=None, format='money', max_annotations=None):
     format = format_templates(format)
 
-    fig.add_trace(go.Scatter(
-        x=data[x_axis],
-        y=data[y_axis],
-        mode='lines+markers',
-        hovertemplate=format['format_hover'],
-        line=dict(color='rgb(112, 176, 224)', width=4),
-        connectgaps=True,
-        line_shape='linear',
-        marker={'size': 12}
-    )
-    )
-
-    annotations = []
-    i = 0
-
-    for yd, xd in zip(data[y_axis], data[x_axis]):
-        if skip_ticks is None or i % skip_ticks == 0:
-            annotations.append(dict(xref='x1', yref='y1',
-                                    y=yd + (data[y_axis].mean() * 0.05), x=xd,
-                                    text=format['format_annotation'](yd),
-                                    font=dict(family='Lato', size=14,
-                                              color='rgb(255, 255, 255)'),
-                                    showarrow=False))
-        i += 1
-
-    fig.update_layout(
-        showlegend=False,
-        annotations=annotations
-    )
-
-    fig.update_layout(yaxis_tickformat=format['format_tick'])
-    fig.update_layout(xaxis_tickformat='%d %b')
-
-    fig = update_layout(fig)
-    fig = customize_figure(fig, title, height)
-
-    return fig
+    values = data[y_axis]
+    annotations = value_annotations(data[x_axis].tolist(), (values + values.mean() * 0.05).tolist(), values.tolist(),
+                                    format['format_annotations'], annotation_step(len(data), skip_ticks, max_annotations))
+
+    return figure([{
+        'type': 'scatter',
+        'x': data[x_axis],
+        'y': data[y_axis],
+        'mode': 'lines+markers',
+        'hovertemplate': format['format_hover'],
+        'line': {'color': 'rgb(112, 176, 224)', 'width': 4, 'shape': 'linear'},
+        'connectgaps': True,
+        'marker': {'size': 12},
+    }], {
+        'showlegend': False,
+        'annotations': annotations,
+        'yaxis': {'tickformat': format['format_tick']},
+        'xaxis': {'tickformat': '%d %b'},
+    }, title, height)
 
 
 def plotly_wordcloud(data, text_column, freq_column, height=290, title=None):
@@ -326,27 +246,20 @@ def plotly_wordcloud(data, text_column, freq_column, height=290, title=None):
     lenth = len(words)
     colors = [py.colors.DEFAULT_PLOTLY_COLORS[random.randrange(1, 10)] for i in range(lenth)]
 
-    data = go.Scatter(
-        x=list(range(lenth)),
-        y=random.choices(range(lenth), k=lenth),
-        mode='text',
-        text=words,
-        hovertext=['{0}: ${1}'.format(w, format_money(f)) for w, f in zip(words, original_frequency)],
-        hoverinfo='text',
-        textfont={'size': frequency, 'color': colors, 'family': 'Lato'})
-
-    fig = go.Figure(data=[data])
-
-    fig.update_layout(
-        showlegend=False,
-        xaxis={'showticklabels': False},
-        yaxis={'showticklabels': False},
-    )
-
-    fig = update_layout(fig)
-    fig = customize_figure(fig, title, height)
-
-    return fig
+    return figure([{
+        'type': 'scatter',
+        'x': list(range(lenth)),
+        'y': random.choices(range(lenth), k=lenth),
+        'mode': 'text',
+        'text': words,
+        'hovertext': ['{0}: ${1}'.format(w, format_money(f)) for w, f in zip(words, original_frequency)],
+        'hoverinfo': 'text',
+        'textfont': {'size': frequency, 'color': colors, 'family': 'Lato'},
+    }], {
+        'showlegend': False,
+        'xaxis': {'showticklabels': False},
+        'yaxis': {'showticklabels': False},
+    }, title, height)
 
 
 def checklist_filter(title, an_id, data, column, max_height=17):
@@ -381,6 +294,23 @@ def dropdown_filter(title, an_id, data, column):
     ), body=True)
 
 
+def search_dropdown_filter(title, an_id, value=None, multi=False):
+    selected = (value or []) if multi else [] if value is None else [value]
+    return dbc.Card(dbc.FormGroup([
+        dbc.Label(title),
+        dcc.Dropdown(
+            id=an_id,
+            options=[
+                {"label": item, "value": item} for item in selected
+            ],
+            value=value,
+            multi=multi,
+            placeholder='Type to search',
+            style={'color': '#212121'}
+        ), ]
+    ), body=True)
+
+
 class LoadingGraph(dcc.Loading):
     def __init__(self, *args, **kwargs):
         fig = go.Figure(data=[go.Scatter(x=[], y=[])])
@@ -0,0 +1,81 @@
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler(object):
+    def __init__(self, path='/eryx-metrics', history=100):
+        self.path = path
+        self.totals = OrderedDict()
+        self.requests = OrderedDict()
+        self.history = deque(maxlen=history)
+        self.lock = threading.Lock()
+
+    def finish(self, tab, args, stages, seconds):
+        profile = {'tab': tab, 'filters': list(args), 'seconds': seconds, 'stages': stages}
+        logger.info(json.dumps(profile, default=str))
+
+        with self.lock:
+            self.history.append(profile)
+            calls, total = self.requests.get(tab, (0, 0.0))
+            self.requests[tab] = (calls + 1, total + seconds)
+            for stage in stages:
+                key = (tab, stage['stage'], stage['component'])
+                totals = self.totals.setdefault(key, {'calls': 0, 'seconds': 0.0})
+                totals['calls'] += 1
+                totals['seconds'] += stage['seconds']
+                for measure in ('rows', 'bytes'):
+                    if stage.get(measure) is not None:
+                        totals[measure] = stage[measure]
+        return profile
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            for name, kind, description, values in [
+                ('eryx_dash_requests_total', 'counter', 'Computed requests',
+                 [({'tab': tab}, calls) for tab, (calls, seconds) in self.requests.items()]),
+                ('eryx_dash_request_seconds_total', 'counter', 'Seconds computing requests',
+                 [({'tab': tab}, seconds) for tab, (calls, seconds) in self.requests.items()]),
+                ('eryx_dash_stage_calls_total', 'counter', 'Executions of each stage',
+                 [(labels(key), totals['calls']) for key, totals in self.totals.items()]),
+                ('eryx_dash_stage_seconds_total', 'counter', 'Seconds spent in each stage',
+                 [(labels(key), totals['seconds']) for key, totals in self.totals.items()]),
+                ('eryx_dash_stage_rows', 'gauge', 'Rows of the last execution of each stage',
+                 [(labels(key), totals['rows']) for key, totals in self.totals.items() if 'rows' in totals]),
+                ('eryx_dash_output_bytes', 'gauge', 'Encoded size of the last output of each chart',
+                 [(labels(key), totals['bytes']) for key, totals in self.totals.items() if 'bytes' in totals]),
+            ]:
+                lines += ['# HELP %s %s' % (name, description), '# TYPE %s %s' % (name, kind)]
+                lines += ['%s{%s} %s' % (name, ','.join('%s="%s"' % item for item in label.items()), repr(value))
+                          for label, value in values]
+        return '\n'.join(lines) + '\n'
+
+    def add_to_server(self, server):
+        if self.path in [rule.rule for rule in server.url_map.iter_rules()]:
+            return
+        # Flask endpoints are unique names, profilers mounted at other paths need their own
+        endpoint = 'eryx_metrics' + self.path.replace('/', '_')
+        server.add_url_rule(self.path, endpoint, lambda: (self.prometheus(), 200,
+                                                          {'Content-Type': 'text/plain; version=0.0.4'}))
+
+
+def labels(key):
+    return OrderedDict(zip(('tab', 'stage', 'component'), key))
+
+
+def rows(data):
+    return len(data) if hasattr(data, '__len__') and not isinstance(data, str) else None
+
+
+def report(profile):
+    lines = ['%-10s %-40s %10s %8s %10s' % ('stage', 'component', 'ms', 'rows', 'bytes')]
+    lines += ['%-10s %-40s %10.1f %8s %10s' % (stage['stage'], stage['component'][:40], 1000 * stage['seconds'],
+                                               '' if stage['rows'] is None else stage['rows'],
+                                               '' if stage['bytes'] is None else stage['bytes'])
+              for stage in profile['stages']]
+    return '\n'.join(lines + ['total %.1f ms' % (1000 * profile['seconds'])])
+
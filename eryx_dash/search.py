@@ -0,0 +1,66 @@
+import threading
+import numpy as np
+import pandas as pd
+from dash.exceptions import PreventUpdate
+
+# Shorter queries match too many values anywhere in them to be worth scanning the whole column
+MIN_CONTAINS_LENGTH = 3
+
+
+class SearchIndex(object):
+    def __init__(self, values):
+        # Values are listed in the order of the option lists of the filters
+        self.values = np.flip(np.sort(np.asarray(values)))
+        self.keys = pd.Series(self.values.astype(str)).str.lower()
+        self.order = np.argsort(self.keys.to_numpy(), kind='stable')
+        self.sorted_keys = self.keys.to_numpy()[self.order]
+
+    def __len__(self):
+        return len(self.values)
+
+    def prefixed(self, query):
+        start, end = np.searchsorted(self.sorted_keys, [query, query + '\uffff'])
+        return np.sort(self.order[start:end])
+
+    def search(self, query, limit=50):
+        query = query.lower()
+        matches = self.prefixed(query) if query else np.arange(len(self.values))
+        # Values containing the query after the first character are only scanned when the prefixes are not enough
+        if len(query) >= MIN_CONTAINS_LENGTH and len(matches) < limit:
+            contained = np.flatnonzero(self.keys.str.contains(query, regex=False).to_numpy())
+            matches = np.concatenate([matches, np.setdiff1d(contained, matches, assume_unique=True)])
+        return self.values[matches[:limit]].tolist()
+
+
+class SearchOptions(object):
+    def __init__(self, data_source, column, page_size=50):
+        self.data_source = data_source
+        self.column = column
+        self.page_size = page_size
+        self.cached = (None, None)
+        self.lock = threading.Lock()
+
+    def index(self, data_sources):
+        version = data_sources.version(self.data_source)
+        with self.lock:
+            if self.cached[0] != version:
+                column_index = data_sources.index(self.data_source, self.column)
+                values = column_index.categories if column_index is not None else \
+                    data_sources.distinct(self.data_source, [self.column])[self.column].dropna().unique()
+                self.cached = (version, SearchIndex(values))
+            return self.cached[1]
+
+    def first(self, data_sources):
+        index = self.index(data_sources)
+        return index.values[0] if len(index) else None
+
+    def options(self, data_sources, search_value, value):
+        if search_value is None:
+            raise PreventUpdate
+
+        # Only the first page of matches is listed, more specific searches reach the others
+        values = self.index(data_sources).search(search_value, self.page_size)
+        # Selected values stay in the options, otherwise the dropdown stops showing them
+        selected = [] if value is None else value if isinstance(value, list) else [value]
+        return [{'label': item, 'value': item} for item in selected if item not in values] + \
+               [{'label': item, 'value': item} for item in values]
@@ -0,0 +1,89 @@
+import base64
+import collections
+import datetime
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+import plotly
+from dash import no_update
+from dash.exceptions import PreventUpdate
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TYPED_ARRAY_MIN_LENGTH = 1000
+TYPED_ARRAY_DTYPES = {'float64': 'f8', 'float32': 'f4', 'int32': 'i4', 'int16': 'i2', 'int8': 'i1',
+                      'uint32': 'u4', 'uint16': 'u2', 'uint8': 'u1'}
+
+
+def plotly_js_version():
+    import dash_core_components
+
+    with open(os.path.join(os.path.dirname(dash_core_components.__file__), 'plotly.min.js')) as bundle:
+        match = re.search(r'plotly\.js v(\d+)\.(\d+)', bundle.read(200))
+    return tuple(int(number) for number in match.groups()) if match else (0, 0)
+
+
+def supports_typed_arrays():
+    # Base64 encoded typed arrays are decoded by plotly.js 2.28 and later
+    try:
+        return plotly_js_version() >= (2, 28)
+    except (ImportError, OSError):
+        return False
+
+
+def typed_array(values):
+    return {'dtype': TYPED_ARRAY_DTYPES[values.dtype.name],
+            'bdata': base64.b64encode(np.ascontiguousarray(values).tobytes()).decode('ascii')}
+
+
+def default(obj, typed_arrays=False):
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        if typed_arrays and obj.dtype.name in TYPED_ARRAY_DTYPES and len(obj) >= TYPED_ARRAY_MIN_LENGTH:
+            return typed_array(np.asarray(obj))
+        if not typed_arrays and not isinstance(obj, np.ndarray) and obj.dtype.kind in 'biufM':
+            return obj.to_numpy()
+        # Dates become timestamps and everything else python scalars, both are encoded like the Plotly encoder does
+        return pd.Series(obj).tolist() if isinstance(obj, np.ndarray) and obj.dtype.kind == 'M' else obj.tolist()
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return plotly.utils.PlotlyJSONEncoder().default(obj)
+
+
+def dumps(obj, typed_arrays=False):
+    if orjson is None:
+        return json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder)
+
+    # Numeric and date arrays are encoded natively, unless they have to be sent as typed arrays
+    option = orjson.OPT_NON_STR_KEYS | (0 if typed_arrays else orjson.OPT_SERIALIZE_NUMPY)
+    return orjson.dumps(obj, default=lambda value: default(value, typed_arrays), option=option).decode('utf-8')
+
+
+def install(app, callback_id, func, typed_arrays=False):
+    from dash._utils import stringify_id
+
+    # Dash 1.x encodes the outputs of the callbacks stored in callback_map with the Plotly encoder, other versions
+    # keep their own serialization
+    entry = getattr(app, 'callback_map', {}).get(callback_id)
+    if entry is None or 'callback' not in entry:
+        return False
+
+    def callback(*args, **kwargs):
+        response = collections.defaultdict(dict)
+        for value, spec in zip(func(*args), kwargs['outputs_list']):
+            if value is not no_update:
+                response[stringify_id(spec['id'])][spec['property']] = value
+        if not response:
+            raise PreventUpdate
+        return dumps({'response': response, 'multi': True}, typed_arrays)
+
+    entry['callback'] = callback
+    return True
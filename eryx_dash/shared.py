@@ -0,0 +1,131 @@
+import os
+import pickle
+import secrets
+import multiprocessing
+import numpy as np
+import pandas as pd
+from multiprocessing import resource_tracker, shared_memory
+
+# Blocks attached by this process, their buffers back the frames returned by attach
+attached = []
+
+
+class SharedFrames(object):
+    def __init__(self, manifest, blocks):
+        self.manifest = manifest
+        self.blocks = blocks
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self.manifest, f)
+
+    def size(self):
+        return sum(block.size for block in self.blocks)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+
+    def unlink(self):
+        self.close()
+        for block in self.blocks:
+            block.unlink()
+
+
+def shareable(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    if column.dtype.kind in 'biufcmM' and not isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+        return column
+    # Python objects can not be shared, strings and other objects are stored as the codes of their categories
+    return column.astype('category')
+
+
+def share_array(values, blocks, prefix):
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1), name='%s-%d' % (prefix, len(blocks)))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+    blocks.append(block)
+    return block.name, values.dtype.str, values.shape
+
+
+def share(data_sources, prefix=None):
+    prefix = prefix or 'eryx-%s' % secrets.token_hex(4)
+    blocks = []
+    manifest = {}
+    for name in list(data_sources.dictionary):
+        df = data_sources.get_original(name)
+        columns = []
+        converted = {}
+        for column_name, column in df.items():
+            shared = shareable(column)
+            if shared is not column:
+                converted[column_name] = column.dtype
+            column = shared
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                columns.append((column_name, share_array(column.cat.codes.to_numpy(), blocks, prefix),
+                                column.cat.categories, column.cat.ordered))
+            else:
+                columns.append((column_name, share_array(column.to_numpy(), blocks, prefix), None, None))
+        index = df.index if isinstance(df.index, pd.RangeIndex) else share_array(df.index.to_numpy(), blocks, prefix)
+        manifest[name] = {'columns': columns, 'index': index, 'owner': os.getpid(), 'converted': converted}
+    return SharedFrames(manifest, blocks)
+
+
+def open_block(name, owner=None):
+    # The process that shared the blocks unlinks them, attached ones must not be removed when this process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 attached blocks are registered in the resource tracker, which unlinks them when the process
+    # exits. The sharing process and the ones it starts with multiprocessing use the same tracker, where the blocks
+    # have to stay registered
+    block = shared_memory.SharedMemory(name=name)
+    parent = multiprocessing.parent_process()
+    if owner != os.getpid() and (parent is None or owner != parent.pid):
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+
+def attach_array(spec, owner=None, blocks=None):
+    block_name, dtype, shape = spec
+    block = open_block(block_name, owner)
+    (attached if blocks is None else blocks).append(block)
+    values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    values.flags.writeable = False
+    return values
+
+
+def attach(manifest, blocks=None, categoricals=True):
+    if isinstance(manifest, str):
+        with open(manifest, 'rb') as f:
+            manifest = pickle.load(f)
+    elif isinstance(manifest, SharedFrames):
+        manifest = manifest.manifest
+
+    dictionary = {}
+    for name, frame in manifest.items():
+        columns = {}
+        converted = frame.get('converted', {})
+        for column_name, spec, categories, ordered in frame['columns']:
+            values = attach_array(spec, frame.get('owner'), blocks)
+            columns[column_name] = values if categories is None else \
+                pd.Categorical.from_codes(values, categories=categories, ordered=ordered)
+            # Without categoricals, columns holding objects get them back in a copy, so the frames compute the same
+            # results as the ones shared
+            if not categoricals and column_name in converted:
+                columns[column_name] = columns[column_name].astype(converted[column_name])
+        index = frame['index'] if isinstance(frame['index'], pd.RangeIndex) else \
+            pd.Index(attach_array(frame['index'], frame.get('owner'), blocks))
+        dictionary[name] = pd.DataFrame(columns, index=index, copy=False)
+    return dictionary
+
+
+def detach(blocks):
+    # Blocks attached for a while are closed, unless something still references their buffers
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            attached.append(block)
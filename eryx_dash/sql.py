@@ -0,0 +1,131 @@
+import sqlite3
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from eryx_dash.metrics import ColumnAggregation, Count
+
+FUNCTIONS = {'sum': 'COALESCE(SUM(%s), 0)', 'mean': 'AVG(%s)', 'nunique': 'COUNT(DISTINCT %s)'}
+
+
+class SQLTable(object):
+    def __init__(self, path, table, parse_dates=None):
+        self.path = path
+        self.table = table
+        self.parse_dates = [] if parse_dates is None else parse_dates
+
+    def connect(self):
+        # Connections are opened for each query, so tables can be read from any thread or process
+        return closing(sqlite3.connect('file:%s?mode=ro' % self.path, uri=True, check_same_thread=False))
+
+    def query(self, sql, params=()):
+        with self.connect() as connection:
+            df = pd.read_sql_query(sql, connection, params=list(params))
+        for column in self.parse_dates:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column])
+        return df
+
+    def relation(self):
+        return Relation(self, [])
+
+
+class Relation(object):
+    def __init__(self, table, conditions):
+        self.table = table
+        self.conditions = conditions
+
+    def where(self, column, values):
+        return Relation(self.table, self.conditions + [(column, list(values))])
+
+    def key(self):
+        return tuple((column, tuple(values)) for column, values in self.conditions)
+
+    def clause(self, extra=()):
+        conditions = [condition(column, values) for column, values in self.conditions] + list(extra)
+        sql = ' AND '.join(sql for sql, params in conditions)
+        return (' WHERE ' + sql if sql else ''), [param for sql, params in conditions for param in params]
+
+    def to_pandas(self, columns=None):
+        where, params = self.clause()
+        select = '*' if columns is None else ', '.join(quote(column) for column in columns)
+        return self.table.query('SELECT %s FROM %s%s' % (select, quote(self.table.table), where), params)
+
+    def count(self):
+        where, params = self.clause()
+        return int(self.table.query('SELECT COUNT(*) FROM %s%s' % (quote(self.table.table), where), params).iloc[0, 0])
+
+    def distinct(self, columns):
+        where, params = self.clause()
+        select = ', '.join(quote(column) for column in columns)
+        return self.table.query('SELECT DISTINCT %s FROM %s%s' % (select, quote(self.table.table), where), params)
+
+    def aggregate(self, leaves, field=None):
+        expressions, params = [], []
+        for i, leaf in enumerate(leaves):
+            sql, leaf_params = expression(leaf)
+            expressions.append('%s AS _%d' % (sql, i))
+            params += leaf_params
+        if field is None:
+            where, where_params = self.clause()
+            df = self.table.query('SELECT %s FROM %s%s' % (', '.join(expressions), quote(self.table.table), where),
+                                  params + where_params)
+            return {leaf: scalar(df['_%d' % i].iloc[0]) for i, leaf in enumerate(leaves)}
+
+        # Rows without a value of the field are in no group, like in pandas
+        where, where_params = self.clause([('%s IS NOT NULL' % quote(field), [])])
+        df = self.table.query('SELECT %s, %s FROM %s%s GROUP BY 1 ORDER BY 1' % (
+            quote(field), ', '.join(expressions), quote(self.table.table), where), params + where_params)
+        df = df.set_index(field)
+        return {leaf: pd.to_numeric(df['_%d' % i]).rename(None) for i, leaf in enumerate(leaves)}
+
+
+def quote(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def condition(column, values):
+    values = list(values)
+    if len(values) == 1:
+        return '%s = ?' % quote(column), [parameter(values[0])]
+    return '%s IN (%s)' % (quote(column), ', '.join('?' * len(values))), [parameter(value) for value in values]
+
+
+def parameter(value):
+    if isinstance(value, pd.Timestamp):
+        # Dates are stored as text, in the format of their string representation
+        return str(value)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def compiles(leaf):
+    # Leaves overriding how their values are taken compute something the compiled expression does not know about
+    base = Count if isinstance(leaf, Count) else ColumnAggregation
+    return leaf.function in FUNCTIONS and \
+        all(getattr(type(leaf), name) is getattr(base, name) for name in ('mask', 'values', 'apply', 'apply_grouped'))
+
+
+def expression(leaf):
+    mask = [condition(column, value if isinstance(value, (list, tuple, set)) else [value])
+            for column, value in leaf.where.items()]
+    params = [param for sql, params in mask for param in params]
+    if leaf.column is None:
+        # Counts add one for every row of the mask
+        value = 'CASE WHEN %s THEN 1 ELSE 0 END' % ' AND '.join(sql for sql, params in mask) if mask else '1'
+    elif mask:
+        value = 'CASE WHEN %s THEN %s END' % (' AND '.join(sql for sql, params in mask), quote(leaf.column))
+    else:
+        value = quote(leaf.column)
+    return FUNCTIONS[leaf.function] % value, params
+
+
+def scalar(value):
+    return np.nan if value is None else value
+
+
+def to_sqlite(df, path, table, indexes=(), chunksize=100000):
+    with closing(sqlite3.connect(path)) as connection:
+        df.to_sql(table, connection, index=False, if_exists='replace', chunksize=chunksize)
+        for column in indexes:
+            connection.execute('CREATE INDEX %s ON %s (%s)' % (
+                quote('%s_%s' % (table, column)), quote(table), quote(column)))
+        connection.commit()
@@ -8,6 +8,7 @@ from eryx_dash.components import EryxRow as Row
 from eryx_dash.components import EryxCol as Col
 from eryx_dash.components import DropdownFilter, Card
 from eryx_dash.data_sources import DataSources
+from eryx_dash.cache import ResultCache
 
 app = Dash(external_stylesheets=[dbc.themes.DARKLY])
 app.title = 'Dashboard | Sales'
@@ -55,7 +56,7 @@ monthly_tab = EryxTab([Row([
             Col([BarChart('sales', 'DayOfWeek', metrics.Sales(), height=height, title='Sales by day of week', format='money')], width=4),
         ])
     ], width=10),
-])], data_sources=data_sources)
+])], data_sources=data_sources, cache=ResultCache())
 
 monthly_tab.add_to_dash_app(app)
 
@@ -66,4 +67,5 @@ app.layout = dbc.Container(
         ]))], no_gutters=True),
     fluid=True)
 
-app.run_server(debug=True)
+if __name__ == '__main__':
+    app.run_server(debug=True, threaded=True)
@@ -1,64 +1,57 @@
-from eryx_dash.metrics import MoneyMetric, IntegerMetric, PercentageMetric, LargeIntegerMetric
+from eryx_dash.metrics import MoneyMetric, IntegerMetric, PercentageMetric, LargeIntegerMetric, Sum, Mean, NUnique, Ratio
 
 
 class Invoices(IntegerMetric):
     def name(self):
         return 'Invoices'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df['Invoice ID'].nunique()
+    def aggregation(self):
+        return NUnique('sales', 'Invoice ID')
 
 
 class Sales(MoneyMetric):
     def name(self):
         return 'Sales'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df['Total'].sum()
+    def aggregation(self):
+        return Sum('sales', 'Total')
 
 
 class IncomePerPurchase(MoneyMetric):
     def name(self):
         return 'Income per purchase'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df.groupby('Invoice ID')['Total'].sum().mean()
+    def aggregation(self):
+        return Ratio(Sum('sales', 'Total'), NUnique('sales', 'Invoice ID'))
 
 
 class Units(MoneyMetric):
     def name(self):
         return 'Units'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df['Quantity'].sum()
+    def aggregation(self):
+        return Sum('sales', 'Quantity')
 
 
 class UnitsPerPurchase(MoneyMetric):
     def name(self):
         return 'Units per Purchase'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df.groupby('Invoice ID')['Quantity'].sum().mean()
+    def aggregation(self):
+        return Ratio(Sum('sales', 'Quantity'), NUnique('sales', 'Invoice ID'))
 
 
 class Rating(IntegerMetric):
     def name(self):
         return 'Rating'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df['Rating'].mean()
+    def aggregation(self):
+        return Mean('sales', 'Rating')
 
 
 class PercentMembers(PercentageMetric):
     def name(self):
         return '% Members'
 
-    def compute(self, data_sources):
-        df = data_sources.get('sales')
-        return df[df['Customer type'] == 'Member']['Total'].sum() / df['Total'].sum()
+    def aggregation(self):
+        return Ratio(Sum('sales', 'Total', where={'Customer type': 'Member'}), Sum('sales', 'Total'))
@@ -6,6 +6,7 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     include_package_data=True,
     install_requires=['pandas', 'dash', 'dash-bootstrap-components', 'millify'],
+    extras_require={'columnar': ['pyarrow'], 'fast': ['orjson']},
     python_requires='>=3.6',
     zip_safe=False
 )
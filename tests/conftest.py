@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from eryx_dash.components import EryxTab, EryxRow, EryxCol, DropdownFilter, ChecklistFilter, Card, PieChart, \
+    LineChart, TreeMapChart, BarLineChart, HorizontalBarChart, BarChart
+from eryx_dash.data_sources import DataSources
+from eryx_dash.metrics import MoneyMetric
+from example import metrics
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, 'example', 'supermarket_sales.csv')
+
+
+@pytest.fixture
+def sales():
+    return pd.read_csv(EXAMPLE)
+
+
+@pytest.fixture
+def sales_with_nulls(sales):
+    sales.loc[::7, 'City'] = None
+    sales.loc[::5, 'Payment'] = None
+    sales.loc[::11, 'Total'] = np.nan
+    return sales
+
+
+class IncomePerInvoice(MoneyMetric):
+    # Computed like the metrics of the README, with a groupby over the strings of the invoices
+    def name(self):
+        return 'Income per invoice'
+
+    def compute(self, data_sources):
+        return data_sources.get('sales').groupby('Invoice ID')['Total'].sum().mean()
+
+
+@pytest.fixture
+def example_sales(sales):
+    sales['Date'] = pd.to_datetime(sales['Date'], format='%m/%d/%Y')
+    sales['Year_Month'] = sales['Date'].dt.month.astype(str) + '-' + sales['Date'].dt.year.astype(str)
+    sales['DayOfWeek'] = sales['Date'].dt.day_name()
+    return sales
+
+
+@pytest.fixture
+def example_tab(example_sales):
+    # The charts of the example app, built over new data sources every time
+    def build(data_sources=None, **kwargs):
+        data_sources = DataSources({'sales': example_sales.copy()}) if data_sources is None else data_sources
+        return EryxTab([EryxRow([
+            EryxCol([DropdownFilter(title='Month', filters=[('sales', 'Year_Month')])]),
+            EryxCol([ChecklistFilter(title='City', filters=[('sales', 'City')])]),
+            EryxCol([ChecklistFilter(title='Payment', filters=[('sales', 'Payment')])]),
+            EryxCol([Card(title='Invoices', metric=metrics.Invoices())]),
+            EryxCol([Card(title='Income per invoice', metric=IncomePerInvoice())]),
+            EryxCol([PieChart('sales', 'Customer type', metrics.Sales())]),
+            EryxCol([LineChart('sales', 'Date', metrics.Sales())]),
+            EryxCol([TreeMapChart('sales', 'City', 'Total')]),
+            EryxCol([BarLineChart('sales', 'Product line', metrics.Sales(), metrics.PercentMembers())]),
+            EryxCol([HorizontalBarChart('sales', 'Payment', IncomePerInvoice(), top_n=10)]),
+            EryxCol([BarChart('sales', 'DayOfWeek', metrics.Sales(), format='money')]),
+        ])], data_sources=data_sources, **kwargs)
+
+    return build
@@ -0,0 +1,56 @@
+from eryx_dash.cache import normalize, ResultCache
+from eryx_dash.serialization import dumps
+
+
+def test_selections_keep_the_filter_they_belong_to():
+    assert normalize(('1-2019', ['Yangon'], None, None)) != normalize(('1-2019', None, ['Yangon'], None))
+    assert normalize((['Member'], ['Female'])) != normalize((['Female'], ['Member']))
+
+
+def test_values_selected_in_a_filter_are_unordered():
+    assert normalize(('1-2019', ['Yangon', 'Mandalay'], None)) == normalize(('1-2019', ['Mandalay', 'Yangon'], None))
+
+
+def test_least_recently_used_entries_are_evicted_over_the_budget():
+    cache = ResultCache(max_bytes=100)
+    cache.set('a', 'A', 40)
+    cache.set('b', 'B', 40)
+    assert cache.get('a') == 'A'
+    cache.set('c', 'C', 40)
+    assert cache.keys() == ['a', 'c']
+    assert cache.stats()['bytes'] == 80
+
+
+def test_setting_a_key_again_replaces_its_size():
+    cache = ResultCache(max_bytes=100)
+    cache.set('a', 'A', 40)
+    cache.set('a', 'AA', 70)
+    assert cache.get('a') == 'AA'
+    assert cache.stats()['bytes'] == 70
+
+
+def test_values_larger_than_the_budget_drop_the_previous_value():
+    cache = ResultCache(max_bytes=100)
+    cache.set('a', 'A', 40)
+    cache.set('a', 'A' * 200, 200)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = ResultCache(max_bytes=100)
+    cache.set('a', 'A', 10)
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 1, 'bytes': 10, 'max_bytes': 100}
+    assert cache.pop('a') == 'A'
+    assert cache.stats()['bytes'] == 0
+
+
+def test_tabs_serve_repeated_selections_from_the_cache(example_tab):
+    tab = example_tab(cache=ResultCache())
+    first = tab.callback('1-2019', ['Yangon'], None)
+    assert tab.cache.stats()['hits'] == 0
+    assert dumps(tab.callback('1-2019', ['Yangon'], None)) == dumps(first)
+    assert tab.cache.stats()['hits'] == 1
@@ -0,0 +1,55 @@
+import pytest
+from eryx_dash.cascading import CascadingOptions
+from eryx_dash.data_sources import DataSources
+
+COLUMNS = ['Year_Month', 'City', 'Payment']
+SELECTIONS = [(None, None, None), ('1-2019', None, None), ('1-2019', ['Yangon'], None),
+              (None, ['Mandalay', 'Naypyitaw'], ['Cash']), ('2-2019', ['Yangon'], ['Ewallet', 'Credit card'])]
+
+
+def expected(df, values):
+    # Every filter keeps the values found together with the values selected in each of the other filters
+    selections = {column: [] if value is None else value if isinstance(value, list) else [value]
+                  for column, value in zip(COLUMNS, values)}
+    options = []
+    for column in COLUMNS:
+        available = set(df[column].dropna())
+        for other, selected in selections.items():
+            if other != column and selected:
+                available &= set(df.loc[df[other].isin(selected), column])
+        options.append([item for item in selections[column] if item not in available] +
+                       sorted(available, reverse=True))
+    return options
+
+
+@pytest.mark.parametrize('values', SELECTIONS)
+def test_options_match_the_values_found_with_the_other_selections(example_sales, values):
+    options = CascadingOptions('sales', COLUMNS).options(DataSources({'sales': example_sales}), values)
+    assert [[option['value'] for option in column] for column in options] == expected(example_sales, values)
+
+
+def test_selected_values_excluded_by_other_filters_are_kept(example_sales):
+    values = ('1-2019', ['Yangon'], ['Cash'])
+    data_sources = DataSources({'sales': example_sales[~((example_sales['City'] == 'Yangon') &
+                                                          (example_sales['Payment'] == 'Cash'))]})
+    options = CascadingOptions('sales', COLUMNS).options(data_sources, values)
+    assert [option['value'] for option in options[2]][0] == 'Cash'
+    assert [option['value'] for option in options[1]][0] == 'Yangon'
+
+
+def test_options_are_rebuilt_when_the_data_changes(example_sales):
+    options = CascadingOptions('sales', COLUMNS)
+    data_sources = DataSources({'sales': example_sales[example_sales['City'] != 'Yangon']})
+    assert 'Yangon' not in [option['value'] for option in options.options(data_sources, (None, None, None))[1]]
+
+    data_sources.replace('sales', example_sales)
+    assert 'Yangon' in [option['value'] for option in options.options(data_sources, (None, None, None))[1]]
+
+
+def test_tabs_cascade_the_filters_over_each_data_source(example_sales, example_tab):
+    tab = example_tab(cascading=True)
+    (filters, options), = tab.cascading
+    assert [filter.options_column() for filter in filters] == [('sales', column) for column in COLUMNS]
+    for values in SELECTIONS:
+        outputs = tab.cascading_callback(options)(*values)
+        assert [[option['value'] for option in column] for column in outputs] == expected(example_sales, values)
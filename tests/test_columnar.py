@@ -0,0 +1,72 @@
+import os
+import pandas as pd
+import pytest
+from eryx_dash.columnar import ColumnarFile
+from eryx_dash.data_sources import DataSources
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(params=['feather', 'parquet'])
+def path(sales, tmp_path, request):
+    path = str(tmp_path / ('sales.' + request.param))
+    getattr(sales, 'to_' + request.param)(path)
+    return path
+
+
+def counted(calls, name, function):
+    def derived(df):
+        calls.append(name)
+        return function(df)
+
+    return derived
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def columnar(path, calls):
+    # Derived columns may use the ones declared before them
+    return ColumnarFile(path, derived={
+        'Date': counted(calls, 'Date', lambda df: pd.to_datetime(df['Date'], format='%m/%d/%Y')),
+        'DayOfWeek': counted(calls, 'DayOfWeek', lambda df: df['Date'].dt.day_name()),
+    })
+
+
+def test_only_the_columns_requested_are_loaded(sales, columnar, calls):
+    df = columnar.load(['City', 'Total'])
+    assert list(df.columns) == ['City', 'Total']
+    pd.testing.assert_frame_equal(df, sales[['City', 'Total']])
+    assert calls == []
+
+
+def test_derived_columns_are_computed_once_and_cached(sales, columnar, calls):
+    dates = pd.to_datetime(sales['Date'], format='%m/%d/%Y')
+    df = columnar.load(['Total', 'DayOfWeek'])
+    assert list(df.columns) == ['Total', 'DayOfWeek']
+    assert df['DayOfWeek'].tolist() == dates.dt.day_name().tolist()
+    assert calls == ['Date', 'DayOfWeek']
+
+    assert columnar.load(['Date'])['Date'].tolist() == dates.tolist()
+    assert calls == ['Date', 'DayOfWeek']
+    assert sorted(os.listdir(os.path.dirname(columnar.path))) == sorted([os.path.basename(columnar.path),
+                                                                         os.path.basename(columnar.derived_path())])
+
+
+def test_derived_columns_are_rebuilt_when_the_source_is_newer(columnar, calls):
+    columnar.load(['DayOfWeek'])
+    derived_time = os.path.getmtime(columnar.derived_path())
+    os.utime(columnar.path, (derived_time + 10, derived_time + 10))
+    columnar.load(['DayOfWeek'])
+    assert calls == ['Date', 'DayOfWeek'] * 2
+
+
+def test_data_sources_load_the_required_columns(sales, columnar):
+    data_sources = DataSources({'sales': columnar})
+    data_sources.require([('sales', 'City'), ('sales', 'Total')])
+    assert list(data_sources.get('sales').columns) == ['City', 'Total']
+    data_sources.require([('sales', 'DayOfWeek')])
+    assert list(data_sources.get('sales').columns) == ['City', 'Total', 'DayOfWeek']
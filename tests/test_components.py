@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+import pytest
+from dash import Dash
+from eryx_dash.components import EryxTab, EryxRow, EryxCol, ChecklistFilter, Card, BarChart
+from eryx_dash.data_sources import DataSources
+from eryx_dash.metrics import MoneyMetric, Sum
+from eryx_dash.serialization import dumps
+from example import metrics
+
+SELECTIONS = [('1-2019', None, None), ('1-2019', ['Yangon', 'Mandalay'], None), ('3-2019', None, ['Cash', 'Ewallet'])]
+
+
+@pytest.mark.parametrize('executor', [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_charts_computed_in_an_executor_match_the_serial_ones(example_tab, executor):
+    serial = example_tab()
+    with executor(2) as pool:
+        parallel = example_tab(executor=pool)
+        for selection in SELECTIONS:
+            assert dumps(parallel.callback(*selection)) == dumps(serial.callback(*selection))
+
+
+def test_optimized_data_sources_compute_the_same_charts(example_tab):
+    tab = example_tab()
+    optimized = example_tab()
+    optimized.data_sources.optimize()
+    assert isinstance(optimized.data_sources.get('sales')['City'].dtype, pd.CategoricalDtype)
+    for selection in SELECTIONS:
+        assert dumps(optimized.callback(*selection)) == dumps(tab.callback(*selection))
+
+
+class StoreSize(MoneyMetric):
+    def name(self):
+        return 'Store size'
+
+    def aggregation(self):
+        return Sum('stores', 'Size')
+
+
+@pytest.fixture
+def stores_tab(sales):
+    # Sales are filtered by city, the stores are read by a card no filter reaches
+    data_sources = DataSources({'sales': sales, 'stores': pd.DataFrame({'Size': [1, 2]})})
+    return EryxTab([EryxRow([EryxCol([
+        ChecklistFilter(title='City', filters=[('sales', 'City')]),
+        Card(title='Sales', metric=metrics.Sales()),
+        BarChart('sales', 'Branch', metrics.Sales()),
+        Card(title='Store size', metric=StoreSize()),
+    ])])], data_sources=data_sources)
+
+
+def test_charts_are_grouped_by_the_filters_reaching_them(stores_tab):
+    city = stores_tab.get_filters()[0]
+    sales_card, bar_chart, stores_card = stores_tab.get_charts()
+    assert list(stores_tab.dependencies().items()) == [((city,), [sales_card, bar_chart]), ((), [stores_card])]
+
+    app = Dash(__name__)
+    stores_tab.add_to_dash_app(app)
+    inputs = {tuple(output.split('.')[0] for output in callback_id.strip('.').split('...')):
+              [item['id'] for item in callback['inputs']] for callback_id, callback in app.callback_map.items()}
+    assert inputs[(sales_card.get_id(), bar_chart.get_id())] == [city.get_id()]
+    assert inputs[(stores_card.get_id(),)] == [stores_tab.load_id()]
+
+
+def test_group_callbacks_only_compute_their_charts(stores_tab):
+    (filters, charts), (no_filters, stores_charts) = stores_tab.dependencies().items()
+    assert stores_tab.group_callback(no_filters, stores_charts)(None) == ['$3']
+    assert set(stores_tab.timings) == {stores_charts[0].get_id()}
+    outputs = stores_tab.group_callback(filters, charts)(['Yangon'])
+    assert set(stores_tab.timings) == {chart.get_id() for chart in stores_tab.get_charts()}
+    assert dumps(outputs) == dumps(stores_tab.callback(['Yangon'])[:2])
+
+
+def update(app, callback_id, inputs, state=(), triggered=()):
+    # Posts the request the browser sends when the inputs of a callback change
+    callback = app.callback_map[callback_id]
+    outputs = [dict(zip(('id', 'property'), output.split('.'))) for output in callback_id.strip('.').split('...')]
+    response = app.server.test_client().post('/_dash-update-component', json={
+        'output': callback_id, 'outputs': outputs if callback_id.startswith('..') else outputs[0],
+        'inputs': [dict(item, value=value) for item, value in zip(callback['inputs'], inputs)],
+        'state': [dict(item, value=value) for item, value in zip(callback['state'], state)],
+        'changedPropIds': list(triggered)})
+    return response.status_code, response.get_json()
+
+
+def test_polls_only_recompute_the_charts_reading_changed_data(stores_tab):
+    app = Dash(__name__)
+    stores_tab.add_to_dash_app(app, refresh_interval=1000)
+    app.layout = stores_tab.dash_component(stores_tab.data_sources)
+    store, = [child for child in app.layout.children if getattr(child, 'id', None) == stores_tab.versions_id()]
+    seen = store.data
+    versions_id = stores_tab.versions_id() + '.data'
+    sales_group, stores_group = [callback_id for callback_id in app.callback_map if callback_id != versions_id]
+    interval = stores_tab.get_id() + '-interval.n_intervals'
+
+    # Unchanged data sources update nothing
+    assert update(app, versions_id, [1], [seen], [interval])[0] == 204
+
+    stores_tab.data_sources.append('stores', pd.DataFrame({'Size': [5]}))
+    status, response = update(app, versions_id, [2], [seen], [interval])
+    assert status == 200
+    seen = response['response'][stores_tab.versions_id()]['data']
+    assert seen['changed'] == ['stores']
+
+    assert update(app, sales_group, [None, seen], triggered=[versions_id])[0] == 204
+    city = stores_tab.get_filters()[0].get_id() + '.value'
+    assert update(app, sales_group, [['Yangon'], seen], triggered=[city])[0] == 200
+    status, response = update(app, stores_group, [seen], triggered=[versions_id])
+    assert response['response'] == {stores_tab.get_charts()[2].get_id(): {'children': '$8'}}
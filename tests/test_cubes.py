@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from eryx_dash.cubes import Cube
+from eryx_dash.metrics import Sum, Count
+
+LEAVES = [Sum('sales', 'Total'), Count('sales'), Count('sales', where={'Gender': 'Female'})]
+CONDITIONS = [[], [('City', ['Yangon', 'Mandalay'])], [('City', ['Yangon']), ('Gender', ['Male'])]]
+
+
+def filtered(df, conditions):
+    for column, values in conditions:
+        df = df[df[column].isin(values)]
+    return df
+
+
+def assert_answers(cube, df, field):
+    for conditions in CONDITIONS:
+        rows = filtered(df, conditions)
+        for leaf in LEAVES:
+            answer = cube.answer(leaf, conditions)
+            if field is None:
+                assert np.isclose(answer, leaf.apply(rows))
+            else:
+                expected = leaf.apply_grouped(rows, field)
+                assert list(answer.index) == list(expected.index)
+                assert np.allclose(answer.to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize('field', [None, 'Payment', 'City'])
+@pytest.mark.parametrize('categorical', [False, True])
+def test_cube_answers_match_the_rows_with_missing_values(sales_with_nulls, field, categorical):
+    if categorical:
+        for column in ['City', 'Gender', 'Payment']:
+            sales_with_nulls[column] = sales_with_nulls[column].astype('category')
+    cube = Cube(sales_with_nulls, ['City', 'Gender'], field, LEAVES)
+    assert_answers(cube, sales_with_nulls, field)
+
+
+@pytest.mark.parametrize('field', [None, 'Payment'])
+def test_appended_cube_matches_the_appended_rows(sales_with_nulls, field):
+    head, tail = sales_with_nulls.iloc[:600], sales_with_nulls.iloc[600:]
+    cube = Cube(head, ['City', 'Gender'], field, LEAVES).appended(tail)
+    assert_answers(cube, pd.concat([head, tail]), field)
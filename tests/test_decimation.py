@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from eryx_dash.decimation import lttb, min_max, decimate
+
+THRESHOLDS = [0, 1, 2, 3, 4, 5, 10, 11, 100, 4999]
+
+
+@pytest.fixture
+def series():
+    random = np.random.default_rng(0)
+    return np.arange(5000, dtype=float), random.normal(size=5000).cumsum()
+
+
+@pytest.mark.parametrize('function', [lttb, min_max])
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+def test_decimation_keeps_at_most_the_threshold(series, function, threshold):
+    x, y = series
+    selected = function(x, y, threshold)
+    assert len(selected) <= threshold
+    assert list(selected) == sorted(set(selected))
+    if threshold >= 2:
+        assert selected[0] == 0 and selected[-1] == len(x) - 1
+
+
+@pytest.mark.parametrize('threshold', [10, 100, 1000])
+def test_lttb_keeps_the_threshold(series, threshold):
+    assert len(lttb(*series, threshold)) == threshold
+
+
+@pytest.mark.parametrize('threshold', [6, 11, 100])
+def test_min_max_keeps_the_extremes(series, threshold):
+    x, y = series
+    selected = min_max(x, y, threshold)
+    assert np.argmin(y) in selected and np.argmax(y) in selected
+    assert len(selected) >= threshold - 3
+
+
+def test_short_series_are_not_decimated(series):
+    x, y = series
+    assert np.array_equal(min_max(x[:10], y[:10], 10), np.arange(10))
+    assert np.array_equal(lttb(x[:10], y[:10], 20), np.arange(10))
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_decimated_frames_keep_the_rows_of_every_y_axis(series, method):
+    x, y = series
+    data = pd.DataFrame({'Date': pd.date_range('2019-01-01', periods=len(x), freq='h'), 'Sales': y, 'Units': -y})
+    decimated = decimate(data, 'Date', ['Sales', 'Units'], 50, method)
+    assert len(decimated) <= 50
+    pd.testing.assert_frame_equal(decimated, data.loc[decimated.index])
+    head = data.iloc[:50]
+    assert decimate(head, 'Date', ['Sales'], 50, method) is head
@@ -0,0 +1,18 @@
+import numpy as np
+from millify import millify
+from eryx_dash.formats import format_money, format_percentage, millify_many, format_money_many, \
+    format_percentage_many
+
+NUMBERS = [0, 1, -1, 0.5, 12.345, 999, 1000, 1001, 123456.789, -98765.4321, 1e6, 2.5e9, 7e12, 3e26, 1e30]
+
+
+def test_millify_many_matches_millify():
+    for precision in [0, 1, 2]:
+        assert millify_many(NUMBERS, precision) == [millify(number, precision=precision) for number in NUMBERS]
+
+
+def test_formats_of_many_numbers_match_the_formats_of_each(sales):
+    totals = sales['Total'].to_numpy()
+    assert format_money_many(totals) == [format_money(number) for number in totals]
+    ratios = np.linspace(0, 1, 101)
+    assert format_percentage_many(ratios) == [format_percentage(number) for number in ratios]
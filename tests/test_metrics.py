@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from eryx_dash.data_sources import DataSources
+from eryx_dash.metrics import MoneyMetric, Sum, Mean, NUnique, Count, Ratio, compute_grouped
+
+AGGREGATIONS = {
+    'Sales': Sum('sales', 'Total'),
+    'Mean rating': Mean('sales', 'Rating'),
+    'Products': NUnique('sales', 'Product line'),
+    'Purchases': Count('sales'),
+    '% Members': Ratio(Count('sales', where={'Customer type': 'Member'}), Count('sales')),
+    'Cash sales': Sum('sales', 'Total', where={'Payment': ['Cash']}),
+}
+
+COMPUTED = {
+    'Sales': lambda df: df['Total'].sum(),
+    'Mean rating': lambda df: df['Rating'].mean(),
+    'Products': lambda df: df['Product line'].nunique(),
+    'Purchases': lambda df: len(df),
+    '% Members': lambda df: (df['Customer type'] == 'Member').sum() / len(df),
+    'Cash sales': lambda df: df.loc[df['Payment'] == 'Cash', 'Total'].sum(),
+}
+
+
+class Declared(MoneyMetric):
+    def __init__(self, name):
+        self.metric_name = name
+
+    def name(self):
+        return self.metric_name
+
+    def aggregation(self):
+        return AGGREGATIONS[self.metric_name]
+
+
+class Computed(MoneyMetric):
+    def __init__(self, name):
+        self.metric_name = name
+
+    def name(self):
+        return self.metric_name
+
+    def compute(self, data_sources):
+        return COMPUTED[self.metric_name](data_sources.get('sales'))
+
+
+@pytest.mark.parametrize('field', ['City', 'Payment', 'Product line'])
+@pytest.mark.parametrize('categorical', [False, True])
+def test_declared_metrics_match_the_metrics_computed_for_every_group(sales_with_nulls, field, categorical):
+    if categorical:
+        sales_with_nulls = DataSources({'sales': sales_with_nulls})
+        sales_with_nulls.optimize(categorize_all=True)
+        sales_with_nulls = sales_with_nulls.get('sales')
+    data_sources = DataSources({'sales': sales_with_nulls}).view()
+
+    declared = compute_grouped([Declared(name) for name in AGGREGATIONS], data_sources, 'sales', field)
+    computed = compute_grouped([Computed(name) for name in COMPUTED], data_sources, 'sales', field)
+    assert list(declared.index) == list(computed.index)
+    assert list(declared.columns) == list(computed.columns)
+    assert np.allclose(declared.to_numpy(float), computed.to_numpy(float), equal_nan=True)
+
+
+def test_declared_metrics_match_the_computed_ones_over_the_filtered_rows(sales):
+    data_sources = DataSources({'sales': sales}).view()
+    data_sources.where('sales', 'City', lambda values: values.isin(['Yangon', 'Mandalay']))
+    rows = sales[sales['City'].isin(['Yangon', 'Mandalay'])]
+    for name in AGGREGATIONS:
+        assert np.isclose(Declared(name).value(data_sources), COMPUTED[name](rows))
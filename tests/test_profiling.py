@@ -0,0 +1,55 @@
+from flask import Flask
+from eryx_dash.profiling import Profiler, report
+
+STAGES = [{'stage': 'filter', 'component': 'City', 'seconds': 0.5, 'rows': 10, 'bytes': None},
+          {'stage': 'figure', 'component': 'Sales', 'seconds': 0.25, 'rows': None, 'bytes': 2048}]
+
+
+def test_totals_add_up_the_stages_of_every_request():
+    profiler = Profiler()
+    profiler.finish('tab', [['Yangon']], STAGES, 1.0)
+    profiler.finish('tab', [['Mandalay']], [dict(STAGES[0], rows=4)], 0.5)
+
+    lines = profiler.prometheus().splitlines()
+    assert 'eryx_dash_requests_total{tab="tab"} 2' in lines
+    assert 'eryx_dash_request_seconds_total{tab="tab"} 1.5' in lines
+    assert 'eryx_dash_stage_calls_total{tab="tab",stage="filter",component="City"} 2' in lines
+    assert 'eryx_dash_stage_seconds_total{tab="tab",stage="filter",component="City"} 1.0' in lines
+    assert 'eryx_dash_stage_rows{tab="tab",stage="filter",component="City"} 4' in lines
+    assert 'eryx_dash_output_bytes{tab="tab",stage="figure",component="Sales"} 2048' in lines
+    assert '# TYPE eryx_dash_stage_rows gauge' in lines
+
+
+def test_reports_list_every_stage():
+    profile = Profiler().finish('tab', [None], STAGES, 1.0)
+    lines = report(profile).splitlines()
+    assert lines[1].split() == ['filter', 'City', '500.0', '10']
+    assert lines[-1] == 'total 1000.0 ms'
+
+
+def test_profilers_are_served_at_their_paths():
+    server = Flask(__name__)
+    first, second = Profiler(), Profiler(path='/other-metrics')
+    first.finish('first', [], STAGES, 1.0)
+    for profiler in [first, second, first]:
+        profiler.add_to_server(server)
+
+    client = server.test_client()
+    assert 'tab="first"' in client.get('/eryx-metrics').get_data(as_text=True)
+    response = client.get('/other-metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    assert 'tab="first"' not in response.get_data(as_text=True)
+
+
+def test_tabs_profile_their_filters_and_charts(example_tab):
+    profiler = Profiler()
+    tab = example_tab(profiler=profiler)
+    tab.callback('1-2019', ['Yangon'], None)
+
+    profile = profiler.history[-1]
+    assert profile['tab'] == tab.get_id()
+    stages = {(stage['stage'], stage['component']) for stage in profile['stages']}
+    assert {('filter', filter.get_id()) for filter in tab.get_filters()} <= stages
+    assert {('encode', chart.get_id()) for chart in tab.get_charts()} <= stages
+    assert 'stage="encode"' in profiler.prometheus()
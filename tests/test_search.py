@@ -0,0 +1,52 @@
+import pytest
+from dash.exceptions import PreventUpdate
+from eryx_dash.data_sources import DataSources
+from eryx_dash.search import SearchIndex, SearchOptions, MIN_CONTAINS_LENGTH
+
+QUERIES = ['', 'a', 'sp', 'SPORTS', 'ion', 'and', 'nothing']
+
+
+def expected(values, query, limit):
+    # Values starting with the query come before the ones containing it anywhere else, both in the option order
+    values = sorted(set(values), reverse=True)
+    query = query.lower()
+    prefixed = [value for value in values if value.lower().startswith(query)]
+    contained = [value for value in values if query in value.lower() and value not in prefixed]
+    if len(query) < MIN_CONTAINS_LENGTH or len(prefixed) >= limit:
+        contained = []
+    return (prefixed + contained)[:limit]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('limit', [2, 50])
+def test_searches_match_the_values_starting_with_and_containing_the_query(sales, query, limit):
+    values = sales['Product line'].unique()
+    assert SearchIndex(values).search(query, limit) == expected(values, query, limit)
+
+
+def test_short_queries_only_match_prefixes():
+    index = SearchIndex(['Yangon', 'Mandalay', 'Naypyitaw'])
+    assert index.search('an') == []
+    assert index.search('and') == ['Mandalay']
+
+
+def test_options_list_the_first_page_and_keep_the_selected_values(sales):
+    options = SearchOptions('sales', 'Invoice ID', page_size=5)
+    data_sources = DataSources({'sales': sales})
+    values = sorted(sales['Invoice ID'], reverse=True)
+    selected = values[-1]
+
+    listed = [option['value'] for option in options.options(data_sources, '', [selected])]
+    assert listed == [selected] + values[:5]
+    assert options.first(data_sources) == values[0]
+    with pytest.raises(PreventUpdate):
+        options.options(data_sources, None, selected)
+
+
+def test_options_are_rebuilt_when_the_data_changes(sales):
+    options = SearchOptions('sales', 'City')
+    data_sources = DataSources({'sales': sales[sales['City'] != 'Yangon']})
+    assert options.options(data_sources, 'yan', None) == []
+
+    data_sources.replace('sales', sales)
+    assert options.options(data_sources, 'yan', None) == [{'label': 'Yangon', 'value': 'Yangon'}]
@@ -0,0 +1,66 @@
+import base64
+import json
+import re
+import numpy as np
+import pandas as pd
+import plotly
+from dash import Dash
+from eryx_dash.serialization import dumps, TYPED_ARRAY_MIN_LENGTH
+
+SELECTION = ('1-2019', ['Yangon', 'Mandalay'], None)
+
+
+def dates(obj):
+    # Plotly writes the nanoseconds of date arrays, orjson the shortest ISO format, plotly.js reads both alike
+    if isinstance(obj, dict):
+        return {key: dates(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [dates(value) for value in obj]
+    if isinstance(obj, str) and re.match(r'\d{4}-\d\d-\d\dT', obj):
+        return pd.Timestamp(obj).isoformat()
+    return obj
+
+
+def plotly_json(obj):
+    return dates(json.loads(json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder)))
+
+
+def test_outputs_encode_like_the_plotly_encoder(example_tab):
+    outputs = example_tab().callback(*SELECTION)
+    assert dates(json.loads(dumps(outputs))) == plotly_json(outputs)
+
+
+def test_values_encode_like_the_plotly_encoder():
+    values = {'dates': pd.Series(pd.date_range('2019-01-01', periods=3)), 'missing': pd.NaT,
+              'day': pd.Timestamp('2019-01-01').date(), 'floats': np.array([0.5, np.nan]),
+              'integers': pd.Series([1, 2], dtype='int8'), 'strings': pd.Index(['a', 'b']), 'scalar': np.float32(1.5)}
+    assert dates(json.loads(dumps(values))) == plotly_json(values)
+
+
+def test_long_numeric_arrays_are_sent_as_typed_arrays():
+    values = np.linspace(0, 1, TYPED_ARRAY_MIN_LENGTH)
+    encoded = json.loads(dumps({'x': values, 'y': values[:10], 'text': pd.Series(['a'] * len(values))},
+                               typed_arrays=True))
+    assert encoded['x']['dtype'] == 'f8'
+    assert np.array_equal(np.frombuffer(base64.b64decode(encoded['x']['bdata']), dtype='f8'), values)
+    assert encoded['y'] == values[:10].tolist()
+    assert encoded['text'] == ['a'] * len(values)
+
+
+def test_fast_json_callbacks_respond_like_dash(example_tab):
+    responses = []
+    for fast_json in [False, True]:
+        app = Dash(__name__)
+        tab = example_tab()
+        tab.add_to_dash_app(app, fast_json=fast_json)
+        app.layout = tab.dash_component(tab.data_sources)
+        callback_id, callback = next((callback_id, callback) for callback_id, callback in app.callback_map.items()
+                                     if len(callback['inputs']) == len(SELECTION))
+        assert (callback['callback'].__module__ == 'eryx_dash.serialization') == fast_json
+        outputs = [dict(zip(('id', 'property'), output.split('.'))) for output in callback_id.strip('.').split('...')]
+        response = app.server.test_client().post('/_dash-update-component', json={
+            'output': callback_id, 'outputs': outputs, 'changedPropIds': [],
+            'inputs': [dict(item, value=value) for item, value in zip(callback['inputs'], SELECTION)]})
+        # Components ids differ between the tabs, their outputs are compared in order
+        responses.append(dates(list(response.get_json()['response'].values())))
+    assert responses[0] == responses[1]
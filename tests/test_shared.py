@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from eryx_dash.components import TreeMapChart
+from eryx_dash.data_sources import DataSources
+from eryx_dash.serialization import dumps
+from eryx_dash.shared import share, attach, detach
+
+ROOT = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+@pytest.fixture
+def shared(sales):
+    shared = share(DataSources({'sales': sales}))
+    yield shared
+    shared.unlink()
+
+
+def test_attached_frames_hold_the_shared_values(sales, shared):
+    blocks = []
+    attached = attach(shared.manifest, blocks)['sales']
+    assert list(attached.columns) == list(sales.columns)
+    assert isinstance(attached['City'].dtype, pd.CategoricalDtype)
+    assert attached['Total'].dtype == sales['Total'].dtype
+    assert not attached['Total'].to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(attached.astype(object), sales.astype(object))
+    del attached
+    detach(blocks)
+
+
+def test_attached_frames_without_categoricals_have_the_original_dtypes(sales, shared):
+    blocks = []
+    attached = attach(shared.manifest, blocks, categoricals=False)['sales']
+    pd.testing.assert_frame_equal(attached, sales)
+    del attached
+    detach(blocks)
+
+
+def test_saved_manifests_attach_in_other_processes(sales, shared, tmp_path):
+    path = str(tmp_path / 'sales.manifest')
+    shared.save(path)
+    script = 'from eryx_dash.shared import attach; print(attach(%r)["sales"]["Total"].sum())' % path
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert float(output.stdout) == pytest.approx(sales['Total'].sum())
+    assert 'leaked' not in output.stderr
+    # Workers exiting must not remove the blocks, which are only unlinked by the process sharing them
+    assert all(os.path.exists('/dev/shm/' + block.name) for block in shared.blocks)
+
+
+def test_unlinked_blocks_are_removed(sales):
+    shared = share(DataSources({'sales': sales}))
+    names = [block.name for block in shared.blocks]
+    assert shared.size() >= sales['Total'].nbytes
+    shared.unlink()
+    assert not any(os.path.exists('/dev/shm/' + name) for name in names)
+
+
+def test_treemaps_of_attached_frames_match_the_original_ones(sales, shared):
+    chart = TreeMapChart('sales', 'City', 'Total')
+    blocks = []
+    attached = DataSources(attach(shared.manifest, blocks))
+    assert dumps(chart.callback(attached)) == dumps(chart.callback(DataSources({'sales': sales})))
+    del attached
+    detach(blocks)
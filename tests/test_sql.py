@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from eryx_dash.data_sources import DataSources
+from eryx_dash.metrics import Sum, Mean, NUnique, Count
+from eryx_dash.sql import SQLTable, to_sqlite
+
+LEAVES = [Sum('sales', 'Total'), Mean('sales', 'Rating'), NUnique('sales', 'Product line'), Count('sales'),
+          Count('sales', where={'Gender': 'Female'}), Sum('sales', 'Total', where={'Payment': ['Cash', 'Ewallet']})]
+CONDITIONS = [[], [('City', ['Yangon', 'Mandalay'])], [('City', ['Yangon']), ('Customer type', ['Member'])]]
+
+
+@pytest.fixture
+def table(sales_with_nulls, tmp_path):
+    path = str(tmp_path / 'sales.db')
+    to_sqlite(sales_with_nulls, path, 'sales', indexes=['City'])
+    return SQLTable(path, 'sales')
+
+
+@pytest.mark.parametrize('field', [None, 'Payment', 'City'])
+@pytest.mark.parametrize('conditions', CONDITIONS)
+def test_compiled_aggregations_match_pandas(sales_with_nulls, table, field, conditions):
+    relation, rows = table.relation(), sales_with_nulls
+    for column, values in conditions:
+        relation, rows = relation.where(column, values), rows[rows[column].isin(values)]
+
+    results = relation.aggregate(LEAVES, field)
+    for leaf in LEAVES:
+        if field is None:
+            assert np.isclose(results[leaf], leaf.apply(rows), equal_nan=True)
+        else:
+            expected = leaf.apply_grouped(rows, field)
+            assert list(results[leaf].index) == list(expected.index)
+            assert np.allclose(results[leaf].to_numpy(float), expected.to_numpy(float), equal_nan=True)
+
+
+def test_lazy_data_sources_match_the_frame(sales_with_nulls, table):
+    data_sources = DataSources({'sales': table}).view()
+    data_sources.restrict('sales', 'City', ['Yangon', 'Naypyitaw'])
+    rows = sales_with_nulls[sales_with_nulls['City'].isin(['Yangon', 'Naypyitaw'])]
+
+    assert data_sources.count('sales') == len(rows)
+    for leaf in LEAVES:
+        assert np.isclose(leaf.compute(data_sources), leaf.apply(rows))
+    # SQLite reads the rows in the order of the index used for the query
+    assert sorted(data_sources.get('sales')['Invoice ID']) == sorted(rows['Invoice ID'])
+
+
+class Discounted(Sum):
+    def values(self, df):
+        return super(Discounted, self).values(df) - 10
+
+
+def test_leaves_overriding_their_values_read_the_rows(sales_with_nulls, table):
+    data_sources = DataSources({'sales': table}).view()
+    data_sources.restrict('sales', 'City', ['Yangon'])
+    rows = sales_with_nulls[sales_with_nulls['City'] == 'Yangon']
+    leaf = Discounted('sales', 'Total')
+    assert np.isclose(leaf.compute(data_sources), leaf.apply(rows))